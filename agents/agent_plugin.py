@@ -1,53 +1,61 @@
-from datetime import datetime
-from typing import Annotated, List, Tuple
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+from typing import Annotated, List, Optional, Tuple
+from config.service_registry import registry
 from semantic_kernel.agents import ChatCompletionAgent
 from semantic_kernel.functions import kernel_function
-from typing import Awaitable, Callable
-from semantic_kernel.kernel import Kernel
-from semantic_kernel.filters import FilterTypes, FunctionInvocationContext
 from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
 from semantic_kernel.connectors.ai.open_ai import OpenAIChatPromptExecutionSettings
 from semantic_kernel.functions import KernelArguments
+from instrumentation.exporters import to_json, to_prometheus
+from instrumentation.filters import Instrumentation
+from plugins.notes_store import NotesStore, clamp
 # older versions
 # from semantic_kernel.kernel_arguments import KernelArguments
 
 class NotesPlugin:
-    """A simple plugin to manage notes."""
+    """A simple plugin to manage notes, kept in SQLite so they survive restarts."""
 
-    def __init__(self):
-        self.notes = []
+    def __init__(self, path: str = "notes.db"):
+        self.store = NotesStore(path)
 
-    @kernel_function(description="List all saved notes with their timestamps.")
-    def list_notes(self) -> Annotated[List[Tuple[str, str]], "Returns all notes as (timestamp, note)."]:
-        """Return all notes with their timestamps."""
-        return self.notes
+    @kernel_function(description="List saved notes, newest first. By default returns a compact summary; set compact to false for a page of notes.")
+    def list_notes(
+        self,
+        page_size: Annotated[int, "Notes per page (1-50)."] = 10,
+        cursor: Annotated[str, "next_cursor from the previous page. Empty for the newest notes."] = "",
+        compact: Annotated[bool, "Only the note count, time span and the 3 newest notes, shortened."] = True,
+    ) -> Annotated[str, "A summary, or a page of notes followed by the next cursor."]:
+        """Return a summary of the notes, or one page of them."""
+        if compact:
+            return self.store.summary()
+        notes, next_cursor = self.store.page(clamp(page_size), cursor or None)
+        lines = [f"[{timestamp}] {note}" for timestamp, note in notes] or ["No notes."]
+        lines.append(f"next_cursor: {next_cursor}" if next_cursor else "No more notes.")
+        return "\n".join(lines)
+
+    @kernel_function(description="Search notes by keywords and/or an ISO timestamp range.")
+    def search_notes(
+        self,
+        query: Annotated[str, "Keywords that must all appear in the note. Empty for any."] = "",
+        since: Annotated[str, "Only notes at or after this ISO timestamp. Empty for no limit."] = "",
+        until: Annotated[str, "Only notes before this ISO timestamp. Empty for no limit."] = "",
+        limit: Annotated[int, "Maximum number of notes (1-50)."] = 10,
+    ) -> Annotated[List[Tuple[str, str]], "Matching notes as (timestamp, note)."]:
+        """Return matching notes, best keyword match first."""
+        return self.store.search(query, since or None, until or None, clamp(limit))
 
     @kernel_function(description="Save a new note with the current timestamp.")
     def write_note(self, note: Annotated[str, "The note message to save."]) -> str:
         """Save a note with the current timestamp."""
-        timestamp = datetime.now().isoformat()
-        self.notes.append((timestamp, note))
+        _, timestamp = self.store.add(note)
         return f"Note saved at {timestamp}."
     
-async def function_invocation_filter(
-    context: FunctionInvocationContext,
-    next: Callable[[FunctionInvocationContext], Awaitable[None]],
-) -> None:
-    # this runs before the function is called
-    print(f"  ---> Calling Plugin {context.function.plugin_name}.{context.function.name} with arguments `{context.arguments}`")
-    # let's await the function call
-    await next(context)
-    # this runs after our functions has been called
-    print(f"  ---> Plugin response from [{context.function.plugin_name}.{context.function.name} is `{context.result}`")
-
-async def notes_agent_example():
+async def notes_agent_example(metrics_format: str = "json", metrics_out: Optional[str] = None):
     """
     Example of an agent using a plugin to manage notes.
-    """
 
-    kernel = Kernel()
-    kernel.add_filter(FilterTypes.FUNCTION_INVOCATION, function_invocation_filter)
+    The plugin calls are traced by ``Instrumentation``; at the end its metrics are
+    printed (or written to ``metrics_out``) as JSON or Prometheus text.
+    """
 
     # Auto-invoke (default behavior)
     # Function Calling Modes
@@ -60,13 +68,14 @@ async def notes_agent_example():
 
     # Initialize the agent with AzureChatCompletion and the NotesPlugin
     agent = ChatCompletionAgent(
-        service=AzureChatCompletion(),
-        #kernel=kernel,
+        service=registry.chat_completion(),
         name="notes_assistant",
         instructions="You are a helpful assistant.",
         plugins=[NotesPlugin()],
         arguments=KernelArguments(settings),
     )
+    # per-function timings, sizes and token usage for the agent's plugin calls
+    instrumentation = Instrumentation().register(agent.kernel)
 
     messages = [
         "I need to buy milk",
@@ -77,4 +86,12 @@ async def notes_agent_example():
     # no chat history here, but we might need this in a real-world scenario
     for m in messages:
         print("*** User:", m)
-        print("*** Agent:", await agent.get_response(messages=m))
\ No newline at end of file
+        print("*** Agent:", await agent.get_response(messages=m))
+
+    print("Hottest plugins (total seconds):", instrumentation.hottest())
+    export = to_prometheus(instrumentation) if metrics_format == "prometheus" else to_json(instrumentation)
+    if metrics_out:
+        with open(metrics_out, "w") as f:
+            f.write(export + "\n")
+    else:
+        print(export)
@@ -1,23 +1,31 @@
-from semantic_kernel.contents import ChatHistorySummarizationReducer
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+from typing import Optional
+
+from agents.thread_store import PersistentChatHistoryAgentThread, ThreadStore
+from agents.token_budget_reducer import TokenBudgetReducer
+from config.service_registry import registry
 from semantic_kernel.agents import ChatCompletionAgent
 from semantic_kernel.agents import ChatHistoryAgentThread
 
-async def keeping_length_in_check_example():
-    chat_history_with_reducer = ChatHistorySummarizationReducer(
-    service=AzureChatCompletion(),
-    target_count=2,
-    threshold_count=2,
+async def keeping_length_in_check_example(thread_id: Optional[str] = None, store_path: str = "threads.db"):
+    # trims locally by token count and only asks the model for a summary
+    # once the history is over max_tokens
+    chat_history_with_reducer = TokenBudgetReducer(
+    service=registry.chat_completion(),
+    max_tokens=200,
+    target_tokens=100,
     )
     chat_history_with_reducer.clear()
 
     simple_agent = ChatCompletionAgent(
-        service=AzureChatCompletion(),
+        service=registry.chat_completion(),
         name="ai_assistant",
         instructions="You are an AI assistant that returns the numbers the user gives you."
     )
 
-    thread: ChatHistoryAgentThread = ChatHistoryAgentThread(chat_history=chat_history_with_reducer)
+    # the reducer only trims what is kept in memory, the store keeps the full thread
+    thread: ChatHistoryAgentThread = PersistentChatHistoryAgentThread(
+        ThreadStore(store_path), thread_id=thread_id, chat_history=chat_history_with_reducer
+    )
 
     for i in range(10):
         user_message = f"hello {i}, please return this number!"
@@ -27,7 +35,7 @@ async def keeping_length_in_check_example():
         print("*** Agent:", response.content)
         
         print(f"--> Message Count: {len(thread)}")
-        # Manually trigger the reduction, but we can also set it to auto on ChatHistorySummarizationReducer
+        # Manually trigger the reduction, but we can also set auto_reduce=True on the reducer
         is_reduced = await thread.reduce()
         if is_reduced:
             print(f"--> History reduced to {len(thread)} messages.")
@@ -1,15 +1,19 @@
-from semantic_kernel.agents import ChatHistoryAgentThread
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+from typing import Optional
+
+from config.service_registry import registry
 from semantic_kernel.agents import ChatCompletionAgent
 
-async def multi_turn_agent_example():
+from agents.thread_store import PersistentChatHistoryAgentThread, ThreadStore
+
+async def multi_turn_agent_example(thread_id: Optional[str] = None, store_path: str = "threads.db"):
     simple_agent = ChatCompletionAgent(
-        service=AzureChatCompletion(),
+        service=registry.chat_completion(),
         name="ai_assistant",
         instructions="You are an AI assistant that helps users with their questions."
     )
 
-    thread: ChatHistoryAgentThread = None
+    # messages are persisted as they arrive; pass a previous thread_id to pick the conversation back up
+    thread = PersistentChatHistoryAgentThread(ThreadStore(store_path), thread_id=thread_id)
 
     user_messages = [
         "hello",
@@ -29,5 +33,6 @@ async def multi_turn_agent_example():
 
     # print the final conversation, so we can see what happens in thread
     print("-" * 25)
+    print("Thread:", thread.id)
     async for m in thread.get_messages():
         print(m.role, m.content)
\ No newline at end of file
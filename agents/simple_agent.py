@@ -1,4 +1,7 @@
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+from typing import AsyncIterator, Optional
+
+from config.service_registry import registry
+from functions.streaming import StreamMetrics, measure_stream
 from semantic_kernel.agents import ChatCompletionAgent
 from semantic_kernel.functions.kernel_arguments import KernelArguments
 
@@ -6,12 +9,29 @@ async def simple_agent_example():
     """
     Example of a simple agent using AzureChatCompletion.
     """
-    # Initialize the agent with AzureChatCompletion
-    simple_agent = ChatCompletionAgent(
-        service=AzureChatCompletion(),
+    response = await get_simple_agent().get_response(messages="What's the capital of France?")
+    print("Agent:", response.content)
+
+def get_simple_agent() -> ChatCompletionAgent:
+    """The shared simple agent (built once, see config/service_registry.py)."""
+    return registry.agent("simple", lambda: ChatCompletionAgent(
+        service=registry.chat_completion(),
         name="ai_assistant",
         instructions="You are an AI assistant that helps users with their questions."
-    )
+    ))
+
+async def stream_simple_agent(message: str, metrics: Optional[StreamMetrics] = None) -> AsyncIterator[str]:
+    """Stream the simple agent's answer to ``message`` chunk by chunk."""
+    async for text in measure_stream(get_simple_agent().invoke_stream(messages=message), metrics):
+        yield text
 
-    response = await simple_agent.get_response(messages="What's the capital of France?")
-    print("Agent:", response.content)
\ No newline at end of file
+async def simple_agent_stream_example():
+    """
+    Same question as simple_agent_example, printed as the answer streams in.
+    """
+    metrics = StreamMetrics()
+    print("Agent: ", end="")
+    async for text in stream_simple_agent("What's the capital of France?", metrics):
+        print(text, end="", flush=True)
+    print()
+    print(metrics.report())
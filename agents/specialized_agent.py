@@ -1,10 +1,14 @@
+from typing import AsyncIterator, Optional
+
 from semantic_kernel.functions.kernel_arguments import KernelArguments
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+from config.service_registry import registry
+from functions.streaming import StreamMetrics, measure_stream
 from semantic_kernel.agents import ChatCompletionAgent
 
 def generate_specialized_agent(expertise, tone, length):
-    templated_agent = ChatCompletionAgent(
-        service=AzureChatCompletion(),
+    # agents are stateless between calls, so one per (expertise, tone, length) is enough
+    return registry.agent(("specialized", expertise, tone, length), lambda: ChatCompletionAgent(
+        service=registry.chat_completion(),
         name=f"{expertise}_assistant",
         instructions="""You are an AI assistant specializing in {{$expertise}}.
         Your tone should be {{$tone}} and your responses should be {{$length}} in length.
@@ -14,8 +18,7 @@ def generate_specialized_agent(expertise, tone, length):
             tone=tone,
             length=length
         ),
-    )
-    return templated_agent
+    ))
 
 async def specialized_agent_example():
     """
@@ -26,3 +29,28 @@ async def specialized_agent_example():
 
     print("Python agent:\n", await python_agent.get_response(messages="Write me a hello world example"))
     print("Java agent:\n",await java_agent.get_response(messages="Write me a hello world example"))
+    print("Registry:", registry.stats())
+
+
+async def stream_specialized_agent(
+    expertise, tone, length, message: str, metrics: Optional[StreamMetrics] = None
+) -> AsyncIterator[str]:
+    """Stream a specialized agent's answer to ``message`` chunk by chunk."""
+    agent = generate_specialized_agent(expertise, tone, length)
+    async for text in measure_stream(agent.invoke_stream(messages=message), metrics):
+        yield text
+
+async def specialized_agent_stream_example():
+    """
+    Same agents as specialized_agent_example, printed as the answers stream in.
+    """
+    for label, expertise, tone in [
+        ("Python agent", "python_programming", "friendly"),
+        ("Java agent", "java_programming", "funny and snappy"),
+    ]:
+        metrics = StreamMetrics()
+        print(f"{label}:")
+        async for text in stream_specialized_agent(expertise, tone, "short", "Write me a hello world example", metrics):
+            print(text, end="", flush=True)
+        print()
+        print(metrics.report())
@@ -0,0 +1,185 @@
+"""Persist agent threads in SQLite.
+
+``ChatHistoryAgentThread`` lives only in memory, so a restart loses every
+conversation.  ``ThreadStore`` appends each message of each thread to a
+SQLite table keyed by ``(thread_id, seq)`` - rows are only ever inserted,
+and that primary key is the per-thread index, so reading the last N messages
+of one thread never touches the others.  ``PersistentChatHistoryAgentThread``
+is a drop-in ``ChatHistoryAgentThread`` that writes every new message through
+to the store and, when reopened by id, loads only the tail of the thread
+(``tail_messages``) the first time it is used.  Nothing is kept in memory for
+threads that are not open, so the number of threads is bounded by disk only.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import AsyncIterable, Dict, List, Optional, Union
+
+from semantic_kernel.agents import ChatHistoryAgentThread
+from semantic_kernel.contents import ChatHistory, ChatMessageContent, FunctionResultContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+# live SDK objects (raw responses) can't be stored and aren't needed to continue a thread
+_NOT_STORED = {"inner_content": True, "items": {"__all__": {"inner_content"}}}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS thread_messages (
+    thread_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (thread_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    message_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_threads_updated ON threads(updated_at);
+"""
+
+
+def dump_message(message: ChatMessageContent) -> str:
+    return message.model_dump_json(exclude_none=True, exclude=_NOT_STORED, fallback=str)
+
+
+def load_message(data: str) -> ChatMessageContent:
+    return ChatMessageContent.model_validate_json(data)
+
+
+class ThreadStore:
+    def __init__(self, path: str = "threads.db"):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def append(self, thread_id: str, messages: List[ChatMessageContent]) -> int:
+        """Append ``messages`` to the thread; returns the thread's new length."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT message_count FROM threads WHERE thread_id = ?", (thread_id,)
+                ).fetchone()
+                start = row[0] if row else 0
+                self._db.executemany(
+                    "INSERT INTO thread_messages (thread_id, seq, role, created_at, message) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (thread_id, start + i, str(m.role.value), now, dump_message(m))
+                        for i, m in enumerate(messages)
+                    ],
+                )
+                count = start + len(messages)
+                self._db.execute(
+                    "INSERT INTO threads (thread_id, created_at, updated_at, message_count) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at, "
+                    "message_count = excluded.message_count",
+                    (thread_id, now, now, count),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return count
+
+    def load_tail(self, thread_id: str, limit: Optional[int] = None) -> List[ChatMessageContent]:
+        """The last ``limit`` messages of the thread (all if None), oldest first.
+
+        A tail never starts with a tool result whose call fell outside it.
+        """
+        with self._lock:
+            if limit is None:
+                rows = self._db.execute(
+                    "SELECT message FROM thread_messages WHERE thread_id = ? ORDER BY seq", (thread_id,)
+                ).fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT message FROM thread_messages WHERE thread_id = ? ORDER BY seq DESC LIMIT ?",
+                    (thread_id, limit),
+                ).fetchall()
+                rows.reverse()
+        messages = [load_message(row[0]) for row in rows]
+        while messages and any(isinstance(item, FunctionResultContent) for item in messages[0].items):
+            messages.pop(0)
+        return messages
+
+    def message_count(self, thread_id: str) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT message_count FROM threads WHERE thread_id = ?", (thread_id,)).fetchone()
+        return row[0] if row else 0
+
+    def list_threads(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+        """Most recently updated threads first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT thread_id, created_at, updated_at, message_count FROM threads "
+                "ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [
+            {"thread_id": r[0], "created_at": r[1], "updated_at": r[2], "message_count": r[3]} for r in rows
+        ]
+
+    def delete(self, thread_id: str) -> None:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute("DELETE FROM thread_messages WHERE thread_id = ?", (thread_id,))
+            self._db.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+            self._db.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class PersistentChatHistoryAgentThread(ChatHistoryAgentThread):
+    """A ``ChatHistoryAgentThread`` whose messages are also written to a ``ThreadStore``."""
+
+    def __init__(
+        self,
+        store: ThreadStore,
+        thread_id: Optional[str] = None,
+        chat_history: Optional[ChatHistory] = None,
+        tail_messages: Optional[int] = 50,
+    ) -> None:
+        super().__init__(chat_history=chat_history, thread_id=thread_id)
+        self._store = store
+        self._tail_messages = tail_messages
+        # a new thread has nothing stored yet; a reopened one loads its tail on first use
+        self._loaded = thread_id is None
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self._loaded = True
+            tail = self._store.load_tail(self._id, self._tail_messages)
+            self._chat_history.messages[:0] = tail
+
+    async def _on_new_message(self, new_message: Union[str, ChatMessageContent]) -> None:
+        self._ensure_loaded()
+        if isinstance(new_message, str):
+            new_message = ChatMessageContent(role=AuthorRole.USER, content=new_message)
+        before = len(self._chat_history.messages)
+        await super()._on_new_message(new_message)
+        if len(self._chat_history.messages) > before:
+            self._store.append(self._id, [new_message])
+
+    async def _delete(self) -> None:
+        await super()._delete()
+        self._store.delete(self._id)
+
+    async def get_messages(self) -> AsyncIterable[ChatMessageContent]:
+        self._ensure_loaded()
+        async for message in super().get_messages():
+            yield message
+
+    async def reduce(self) -> Optional[ChatHistory]:
+        # reducing only trims what is in memory; the stored thread keeps every message
+        self._ensure_loaded()
+        return await super().reduce()
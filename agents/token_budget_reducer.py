@@ -0,0 +1,157 @@
+"""Keep a chat history under a token budget without an LLM call per turn.
+
+``ChatHistorySummarizationReducer`` with a small ``target_count`` asks the
+model for a summary on nearly every turn.  ``TokenBudgetReducer`` instead
+keeps a running token total (only messages added since the last check are
+counted, with the tokenizer from ``functions/tokens.py``) and does nothing
+until the history is over ``max_tokens``.  It then drops the oldest messages
+until the rest fits in ``target_tokens``, never keeping a tool result whose
+call was dropped, and keeps the first system/developer message.  If a
+``service`` is given, the dropped messages are folded into a summary message
+instead of being discarded, so summarization only happens when the budget is
+actually exceeded.
+"""
+
+import logging
+import sys
+from typing import List, Optional
+
+if sys.version_info < (3, 11):
+    from typing_extensions import Self
+else:
+    from typing import Self
+
+from pydantic import Field, PrivateAttr
+from semantic_kernel.connectors.ai.chat_completion_client_base import ChatCompletionClientBase
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.contents import (
+    ChatHistory,
+    ChatMessageContent,
+    FunctionCallContent,
+    FunctionResultContent,
+    TextContent,
+)
+from semantic_kernel.contents.history_reducer.chat_history_reducer import ChatHistoryReducer
+from semantic_kernel.contents.history_reducer.chat_history_reducer_utils import (
+    SUMMARY_METADATA_KEY,
+    contains_function_call_or_result,
+)
+from semantic_kernel.contents.history_reducer.chat_history_summarization_reducer import (
+    DEFAULT_SUMMARIZATION_PROMPT,
+)
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from functions.tokens import DEFAULT_ENCODING, count_tokens
+
+logger = logging.getLogger(__name__)
+
+# role markers and separators the chat format adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def message_tokens(message: ChatMessageContent, encoding: str = DEFAULT_ENCODING) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS
+    for item in message.items:
+        if isinstance(item, TextContent):
+            tokens += count_tokens(item.text, encoding)
+        elif isinstance(item, FunctionCallContent):
+            tokens += count_tokens(item.name, encoding) + count_tokens(str(item.arguments or ""), encoding)
+        elif isinstance(item, FunctionResultContent):
+            tokens += count_tokens(str(item.result), encoding)
+    return tokens
+
+
+def _is_tool_result(message: ChatMessageContent) -> bool:
+    return any(isinstance(item, FunctionResultContent) for item in message.items)
+
+
+class TokenBudgetReducer(ChatHistoryReducer):
+    """A ChatHistory that trims (or summarizes) its oldest messages once it exceeds ``max_tokens``."""
+
+    target_count: int = Field(default=2, gt=0, description="Most recent messages always kept.")
+    max_tokens: int = Field(default=4000, gt=0, description="Reduce once the history is larger than this.")
+    target_tokens: int = Field(default=2000, gt=0, description="Size to reduce the history to.")
+    encoding: str = DEFAULT_ENCODING
+    service: Optional[ChatCompletionClientBase] = None
+    summarization_instructions: str = DEFAULT_SUMMARIZATION_PROMPT
+    execution_settings: Optional[PromptExecutionSettings] = None
+
+    _counted: List[ChatMessageContent] = PrivateAttr(default_factory=list)
+    _counts: List[int] = PrivateAttr(default_factory=list)
+    _total: int = PrivateAttr(default=0)
+
+    def _sync(self) -> None:
+        """Bring the running total up to date with ``messages``."""
+        messages = self.messages
+        counted = self._counted
+        unchanged = (
+            len(messages) >= len(counted)
+            and (not counted or (messages[0] is counted[0] and messages[len(counted) - 1] is counted[-1]))
+        )
+        if not unchanged:
+            # replaced or edited in place: start over
+            counted.clear()
+            self._counts.clear()
+            self._total = 0
+        for message in messages[len(counted):]:
+            tokens = message_tokens(message, self.encoding)
+            counted.append(message)
+            self._counts.append(tokens)
+            self._total += tokens
+
+    @property
+    def token_count(self) -> int:
+        self._sync()
+        return self._total
+
+    def _cut_index(self, keep_from: int) -> Optional[int]:
+        """First message to keep so that the newest messages fit in ``target_tokens``."""
+        counts = self._counts
+        budget = self.target_tokens - sum(counts[:keep_from])
+        cut = len(counts)
+        used = 0
+        while cut > keep_from and (len(counts) - cut < self.target_count or used + counts[cut - 1] <= budget):
+            cut -= 1
+            used += counts[cut]
+        # a tool result is only kept together with the call that produced it
+        while cut < len(counts) and _is_tool_result(self.messages[cut]):
+            cut += 1
+        if cut <= keep_from or cut >= len(counts):
+            return None
+        return cut
+
+    async def reduce(self) -> Optional[Self]:
+        self._sync()
+        if self._total <= self.max_tokens:
+            return None
+        history = self.messages
+        # the first system/developer prompt is never dropped
+        first = history[0]
+        is_prompt = first.role in (AuthorRole.SYSTEM, AuthorRole.DEVELOPER) and not first.metadata.get(SUMMARY_METADATA_KEY)
+        keep_from = 1 if is_prompt else 0
+        cut = self._cut_index(keep_from)
+        if cut is None:
+            logger.info("No safe place to reduce the chat history.")
+            return None
+
+        head = history[:keep_from]
+        dropped = history[keep_from:cut]
+        if self.service is not None:
+            summary = await self._summarize(dropped)
+            if summary is not None:
+                summary.metadata[SUMMARY_METADATA_KEY] = True
+                head = [*head, summary]
+        self.messages = [*head, *history[cut:]]
+        logger.info("Reduced chat history from %d to %d tokens.", self._total, self.token_count)
+        return self
+
+    async def _summarize(self, messages: List[ChatMessageContent]) -> Optional[ChatMessageContent]:
+        # tool traffic is left out of the summary, as in ChatHistorySummarizationReducer
+        chat_history = ChatHistory(messages=[m for m in messages if not contains_function_call_or_result(m)])
+        if not chat_history.messages:
+            return None
+        settings = self.execution_settings or self.service.get_prompt_execution_settings_from_settings(
+            PromptExecutionSettings()
+        )
+        chat_history.add_message(ChatMessageContent(role=AuthorRole.SYSTEM, content=self.summarization_instructions))
+        return await self.service.get_chat_message_content(chat_history=chat_history, settings=settings)
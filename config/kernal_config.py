@@ -5,4 +5,4 @@ def create_kernel(chat_completion: AzureChatCompletion) -> Kernel:
     """Initialize the kernel and add Azure Chat Completion service."""
     kernel = Kernel()
     kernel.add_service(chat_completion)
-    return kernel
\ No newline at end of file
+    return kernel
@@ -0,0 +1,377 @@
+"""One shared queue and rate limit for every LLM request.
+
+Without this, every ``kernel.invoke`` and ``agent.get_response`` goes out at
+once, and when Azure answers 429 each OpenAI client retries on its own
+schedule, so the retries arrive together and get throttled again.
+``LLMScheduler`` sits under the OpenAI clients as a layer of the service
+registry's ``httpx`` transport:
+
+* requests wait in a priority queue (see ``priority()``) until a
+  requests-per-minute and a tokens-per-minute token bucket both allow them;
+  the token cost is estimated from the prompt plus ``max_tokens`` and
+  corrected with the usage the service reports;
+* a 429 pauses the whole queue for its Retry-After and halves the rates,
+  which then creep back up with each success (AIMD), so the limits adapt to
+  what the deployment really allows;
+* 429 / 5xx / connection errors are retried here with jittered exponential
+  backoff, never shorter than Retry-After - the clients' own retries are
+  switched off;
+* identical non-streaming requests already in flight are sent once and the
+  answer is shared (``coalesce``) - only when the answer is meant to be
+  the same anyway (see ``coalescable()``);
+* time spent queued is recorded per priority, see ``metrics()``.
+
+    registry.use_scheduler(LLMScheduler(requests_per_minute=300, tokens_per_minute=60_000))
+    kernel = create_kernel(registry.chat_completion())
+
+Requests then still go through the registry's connection pool, its limits
+and its connection tracing, and ``registry.stats()`` includes ``metrics()``.
+Like the registry, a scheduler belongs to the event loop that first uses it;
+``registry.aclose()`` closes it.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import email.utils
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import random
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from functions.tokens import count_tokens
+from instrumentation.histograms import SECONDS_BUCKETS, Histogram
+
+HIGH, NORMAL, LOW = 0, 5, 10
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("llm_priority", default=NORMAL)
+
+
+@contextlib.contextmanager
+def priority(level: int) -> Iterator[None]:
+    """LLM requests made inside this block queue at ``level`` (lower goes first)."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def retry_after(headers: httpx.Headers) -> Optional[float]:
+    """Seconds to wait according to ``retry-after-ms`` / ``retry-after`` (seconds or an HTTP date)."""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+def coalescable(payload: Dict[str, Any]) -> bool:
+    """Whether identical copies of this request may share one answer.
+
+    Embeddings always may.  A completion only when it asks for one choice
+    (``n`` unset or 1) and is meant to be reproducible: ``temperature`` set
+    to 0 or an explicit ``seed``.  Anything else is sampled, and callers
+    sending the same prompt twice expect two different answers.
+    """
+    if "input" in payload:
+        return True
+    if "messages" not in payload or payload.get("n", 1) not in (None, 1):
+        return False
+    return payload.get("temperature") == 0 or payload.get("seed") is not None
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.base_rate = per_minute / 60.0
+        self.rate = self.base_rate
+        # quotas are enforced over short windows, so don't allow a whole minute's worth at once
+        self.capacity = burst or max(per_minute / 6.0, 1.0)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)  # a request bigger than the bucket still gets through when it is full
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 6,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        coalesce: bool = True,
+        completion_tokens: int = 256,
+        min_rate_scale: float = 0.1,
+        rate_increase: float = 0.02,
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.coalesce = coalesce
+        self.completion_tokens = completion_tokens
+        self.min_rate_scale = min_rate_scale
+        self.rate_increase = rate_increase
+        self.rate_scale = 1.0
+        self._queue: List[list] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._paused_until = 0.0
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._random = random.Random()
+        self.queue_wait: Dict[int, Histogram] = {}
+        self.stats = {
+            "requests": 0, "attempts": 0, "retries": 0, "rate_limited": 0,
+            "coalesced": 0, "errors": 0, "max_queued": 0,
+        }
+
+    async def aclose(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    # -- queue -----------------------------------------------------------------
+
+    def _dispatch(self) -> None:
+        """Let queued requests go, best priority first, while the limits allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        while self._queue:
+            _, _, tokens, future = self._queue[0]
+            if future.done():  # cancelled while waiting
+                heapq.heappop(self._queue)
+                continue
+            wait = self._paused_until - now
+            if self.requests is not None:
+                wait = max(wait, self.requests.wait_time(1, now))
+            if self.tokens is not None:
+                wait = max(wait, self.tokens.wait_time(tokens, now))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._queue)
+            if self.requests is not None:
+                self.requests.take(1, now)
+            if self.tokens is not None:
+                self.tokens.take(tokens, now)
+            future.set_result(None)
+
+    async def _acquire(self, tokens: int, level: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, [level, next(self._seq), tokens, future])
+        self.stats["max_queued"] = max(self.stats["max_queued"], len(self._queue))
+        queued = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        finally:
+            histogram = self.queue_wait.get(level)
+            if histogram is None:
+                histogram = self.queue_wait[level] = Histogram(SECONDS_BUCKETS)
+            histogram.observe(time.monotonic() - queued)
+
+    # -- adaptation ------------------------------------------------------------
+
+    def _set_scale(self, scale: float) -> None:
+        self.rate_scale = min(max(scale, self.min_rate_scale), 1.0)
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket._refill(time.monotonic())
+                bucket.rate = bucket.base_rate * self.rate_scale
+
+    def _throttled(self, wait: Optional[float]) -> None:
+        self.stats["rate_limited"] += 1
+        self._set_scale(self.rate_scale / 2)
+        if wait:
+            # everyone waits, not just the request that got the 429
+            self._paused_until = max(self._paused_until, time.monotonic() + wait)
+
+    def _succeeded(self) -> None:
+        if self.rate_scale < 1.0:
+            self._set_scale(self.rate_scale + self.rate_increase)
+
+    def _backoff(self, attempt: int, wait: Optional[float]) -> float:
+        jittered = self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return (wait or 0.0) + jittered
+
+    # -- sending ---------------------------------------------------------------
+
+    def estimate_tokens(self, payload: Dict[str, Any]) -> int:
+        """Prompt tokens plus the completion budget, as Azure counts them against the quota."""
+        if "input" in payload:  # embeddings
+            inputs = payload["input"]
+            return sum(count_tokens(str(i)) for i in (inputs if isinstance(inputs, list) else [inputs]))
+        prompt = sum(count_tokens(json.dumps(m.get("content"))) for m in payload.get("messages", []))
+        budget = payload.get("max_tokens") or payload.get("max_completion_tokens") or self.completion_tokens
+        return prompt + budget
+
+    async def send(self, request: httpx.Request, inner: httpx.AsyncBaseTransport) -> httpx.Response:
+        self.stats["requests"] += 1
+        body = await request.aread()
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            payload = {}
+        if payload.get("stream"):
+            return await self._send(request, inner, payload)
+        if not (self.coalesce and coalescable(payload)):
+            return self._copy(await self._send_buffered(request, inner, payload))
+
+        key = hashlib.sha256(str(request.url).encode("utf-8") + b"\0" + body).hexdigest()
+        leader = self._in_flight.get(key)
+        if leader is not None:
+            self.stats["coalesced"] += 1
+            try:
+                return self._copy(await asyncio.shield(leader))
+            except asyncio.CancelledError:
+                # Task.cancelling() is Python 3.11+; before that assume only the leader was
+                # cancelled, the usual case (its caller gave up, ours did not)
+                cancelling = getattr(asyncio.current_task(), "cancelling", None)
+                if not leader.cancelled() or (cancelling is not None and cancelling()):
+                    raise
+                # the request we were waiting on was cancelled; send ours instead
+        future = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        # followers re-raise the error; don't warn when there are none
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            result = await self._send_buffered(request, inner, payload)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return self._copy(result)
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    async def _send_buffered(self, request, inner, payload) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        """Send and read the whole (JSON) body, correcting the token bucket with the reported usage."""
+        estimate = self.estimate_tokens(payload)
+        response = await self._send(request, inner, payload, estimate)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        if self.tokens is not None and response.status_code < 400:
+            try:
+                used = json.loads(content).get("usage", {}).get("total_tokens")
+            except (ValueError, AttributeError):
+                used = None
+            if used is not None:
+                self.tokens.give(estimate - used)
+        # the body is already decoded, so drop the headers describing the wire encoding
+        headers = [(k, v) for k, v in response.headers.multi_items() if k not in ("content-encoding", "content-length")]
+        return response.status_code, headers, content
+
+    @staticmethod
+    def _copy(result: Tuple[int, List[Tuple[str, str]], bytes]) -> httpx.Response:
+        status, headers, content = result
+        return httpx.Response(status, headers=headers, content=content)
+
+    async def _send(self, request, inner, payload, estimate: Optional[int] = None) -> httpx.Response:
+        """Queue, send and retry one request."""
+        tokens = estimate if estimate is not None else self.estimate_tokens(payload)
+        level = _priority.get()
+        attempt = 0
+        while True:
+            await self._acquire(tokens, level)
+            self.stats["attempts"] += 1
+            try:
+                response = await inner.handle_async_request(request)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    self.stats["errors"] += 1
+                    raise
+                wait = None
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self._succeeded()
+                    return response
+                if attempt >= self.max_retries:
+                    self.stats["errors"] += 1
+                    return response
+                wait = retry_after(response.headers)
+                await response.aread()
+                await response.aclose()
+                if response.status_code == 429:
+                    self._throttled(wait)
+            self.stats["retries"] += 1
+            await asyncio.sleep(self._backoff(attempt, wait))
+            attempt += 1
+
+    # -- reporting -------------------------------------------------------------
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            **self.stats,
+            "queued": sum(1 for entry in self._queue if not entry[3].done()),
+            "in_flight_coalesced": len(self._in_flight),
+            "paused_seconds": round(max(self._paused_until - now, 0.0), 3),
+            "rate_scale": round(self.rate_scale, 3),
+            "requests_per_minute": round(self.requests.rate * 60, 1) if self.requests else None,
+            "tokens_per_minute": round(self.tokens.rate * 60, 1) if self.tokens else None,
+            "queue_wait_seconds": {str(level): h.snapshot() for level, h in sorted(self.queue_wait.items())},
+        }
+
+
+class ScheduledTransport(httpx.AsyncBaseTransport):
+    def __init__(self, scheduler: LLMScheduler, inner: httpx.AsyncBaseTransport):
+        self.scheduler = scheduler
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self.scheduler.send(request, self.inner)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def scheduler_from_env() -> Optional[LLMScheduler]:
+    """A scheduler for ``LLM_REQUESTS_PER_MINUTE`` / ``LLM_TOKENS_PER_MINUTE``, or None if neither is set."""
+    rpm = os.getenv("LLM_REQUESTS_PER_MINUTE")
+    tpm = os.getenv("LLM_TOKENS_PER_MINUTE")
+    if not (rpm or tpm):
+        return None
+    return LLMScheduler(float(rpm) if rpm else None, float(tpm) if tpm else None)
@@ -0,0 +1,191 @@
+"""Share one HTTP connection pool between chat services and agents.
+
+Every ``AzureChatCompletion()`` builds its own OpenAI client and with it its
+own ``httpx`` connection pool, so each new agent pays for a fresh TCP + TLS
+handshake.  ``ServiceRegistry`` hands out chat services that all send through
+one pooled ``httpx.AsyncClient`` and caches agents by key (e.g. the
+``(expertise, tone, length)`` of a specialized agent).  Connection events are
+traced on the shared client, so ``stats()`` shows how many requests went out
+over how many connections.  With ``use_scheduler()`` every request also goes
+through an ``LLMScheduler`` (config/rate_limiter.py) layered on the pool's
+transport, so rate limits and retries share the pool, its limits and its
+tracing.
+
+The pool belongs to the event loop that first uses it; use the registry from
+a single ``asyncio.run``.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import httpx
+from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion, AzureTextEmbedding
+
+from config.rate_limiter import LLMScheduler, ScheduledTransport
+
+
+class ConnectionStats:
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    async def trace(self, event: str, info: Dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+        elif event.endswith(".send_request_headers.started"):
+            self.requests += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        reused = max(self.requests - self.connections_opened, 0)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "reused_requests": reused,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+class ServiceRegistry:
+    def __init__(
+        self,
+        max_connections: int = int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections: int = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry: float = 60.0,
+        timeout: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.connection_stats = ConnectionStats()
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._timeout = timeout
+        self._transport = transport
+        self._scheduler: Optional[LLMScheduler] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._services: Dict[Any, Any] = {}
+        self._service_kwargs: Dict[Any, Dict[str, Any]] = {}
+        self._agents: Dict[Hashable, Any] = {}
+        self._lock = threading.RLock()
+        self.agent_stats = {"hits": 0, "misses": 0}
+
+    async def _attach_trace(self, request: httpx.Request) -> None:
+        request.extensions["trace"] = self.connection_stats.trace
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            with self._lock:
+                if self._http_client is None:
+                    transport = self._transport or httpx.AsyncHTTPTransport(limits=self._limits)
+                    if self._scheduler is not None:
+                        transport = ScheduledTransport(self._scheduler, transport)
+                    self._http_client = httpx.AsyncClient(
+                        transport=transport,
+                        timeout=self._timeout,
+                        event_hooks={"request": [self._attach_trace]},
+                    )
+        return self._http_client
+
+    def use_transport(self, transport: Optional[httpx.AsyncBaseTransport]) -> None:
+        """Send through ``transport`` (e.g. an in-process fake service) instead of the network.
+
+        Only before the shared client exists; ``await aclose()`` first to switch later.
+        """
+        with self._lock:
+            if self._http_client is not None:
+                raise RuntimeError("the shared HTTP client is already open; await aclose() first")
+            self._transport = transport
+
+    def use_scheduler(self, scheduler: Optional[LLMScheduler]) -> None:
+        """Queue, rate-limit and retry every request through ``scheduler``.
+
+        Only before the shared client exists, like ``use_transport()``.  The
+        services' own retries are switched off, and ``aclose()`` closes the
+        scheduler and detaches it.
+        """
+        with self._lock:
+            if self._http_client is not None:
+                raise RuntimeError("the shared HTTP client is already open; await aclose() first")
+            self._scheduler = scheduler
+
+    def _service(self, cls, service_id: Optional[str], **kwargs: Any):
+        key = (cls, service_id)
+        service = self._services.get(key)
+        if service is None:
+            with self._lock:
+                service = self._services.get(key)
+                if service is None:
+                    service = cls(service_id=service_id, **kwargs)
+                    options: Dict[str, Any] = {"http_client": self.http_client}
+                    if self._scheduler is not None:
+                        # retries happen in the scheduler, with the shared backoff, not in each client
+                        options["max_retries"] = 0
+                    service.client = service.client.with_options(**options)
+                    self._service_kwargs[key] = kwargs
+                    self._services[key] = service
+                    return service
+        built_with = self._service_kwargs.get(key, kwargs)
+        if kwargs != built_with:
+            # one service per (class, service_id): a second configuration would silently get the first
+            raise ValueError(f"{cls.__name__} {service_id!r} was already created with {built_with}, not {kwargs}")
+        return service
+
+    def chat_completion(self, service_id: Optional[str] = None, **kwargs: Any) -> AzureChatCompletion:
+        """The cached ``AzureChatCompletion`` for ``service_id``, sending through the shared pool.
+
+        ``kwargs`` apply when the service is first built; asking again for the
+        same ``service_id`` with different ones raises ``ValueError``.
+        """
+        return self._service(AzureChatCompletion, service_id, **kwargs)
+
+    def text_embedding(self, service_id: Optional[str] = None, **kwargs: Any) -> AzureTextEmbedding:
+        """The cached ``AzureTextEmbedding`` for ``service_id``, sending through the shared pool (see ``chat_completion``)."""
+        return self._service(AzureTextEmbedding, service_id, **kwargs)
+
+    def agent(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """The agent cached under ``key``, built with ``factory()`` the first time."""
+        agent = self._agents.get(key)
+        if agent is not None:
+            self.agent_stats["hits"] += 1
+            return agent
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is None:
+                self.agent_stats["misses"] += 1
+                agent = self._agents[key] = factory()
+            else:
+                self.agent_stats["hits"] += 1
+        return agent
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "connections": self.connection_stats.snapshot(),
+            "services": len(self._services),
+            "agents": {**self.agent_stats, "cached": len(self._agents)},
+        }
+        if self._scheduler is not None:
+            stats["scheduler"] = self._scheduler.metrics()
+        return stats
+
+    async def aclose(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        if self._scheduler is not None:
+            # its queue and timers belong to the event loop that is finishing
+            await self._scheduler.aclose()
+            self._scheduler = None
+        # the cached services and agents were bound to the closed client
+        self._services.clear()
+        self._service_kwargs.clear()
+        self._agents.clear()
+
+
+registry = ServiceRegistry()
@@ -1,9 +1,58 @@
 import asyncio
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from functions.streaming import StreamMetrics, measure_stream
+
+
+@dataclass
+class Step:
+    """One semantic function call in a pipeline.
+
+    The step's ``input`` is the document text, or the output of the step named
+    in ``input_from``, which also makes it depend on that step. Steps without
+    dependencies between them run concurrently.
+    """
+    name: str
+    function: str
+    arguments: Dict[str, Any] = field(default_factory=dict)
+    input_from: Optional[str] = None
+
+
+DEFAULT_PIPELINE = [
+    Step("summary", "tldr"),
+    Step("translation", "translator", {"target_lang": "French"}),
+]
+
+# e.g. translate the summary instead of the full text
+SUMMARY_TRANSLATION_PIPELINE = [
+    Step("summary", "tldr"),
+    Step("translation", "translator", {"target_lang": "French"}, input_from="summary"),
+]
+
+
+def _check_pipeline(steps: Sequence[Step]) -> None:
+    names = [s.name for s in steps]
+    if len(set(names)) != len(names):
+        raise ValueError("step names must be unique")
+    by_name = {s.name: s for s in steps}
+    for step in steps:
+        seen = set()
+        current = step
+        while current.input_from is not None:
+            if current.input_from not in by_name:
+                raise ValueError(f"step '{current.name}' depends on unknown step '{current.input_from}'")
+            if current.name in seen:
+                raise ValueError(f"dependency cycle through step '{current.name}'")
+            seen.add(current.name)
+            current = by_name[current.input_from]
+
 
 class SemanticOrchestrator:
-    def __init__(self, kernel, functions):
+    def __init__(self, kernel, functions, max_concurrency: int = 4):
         self.kernel = kernel
         self.functions = functions
+        self.max_concurrency = max_concurrency
 
     async def summarize(self, text: str):
         summary = await self.kernel.invoke(self.functions["tldr"], input=text)
@@ -17,6 +66,73 @@ class SemanticOrchestrator:
         print(translation)
         return translation
 
+    async def run_pipeline(
+        self,
+        text: str,
+        steps: Sequence[Step] = DEFAULT_PIPELINE,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> Dict[str, Any]:
+        """Run ``steps`` over ``text``, each step as soon as its input is ready.
+
+        Returns the function results keyed by step name. ``semaphore`` caps how
+        many LLM calls are in flight; by default a new one of ``max_concurrency``.
+        """
+        _check_pipeline(steps)
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrency)
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step: Step):
+            step_input = text if step.input_from is None else str(await tasks[step.input_from])
+            async with semaphore:
+                return await self.kernel.invoke(self.functions[step.function], input=step_input, **step.arguments)
+
+        for step in steps:
+            tasks[step.name] = asyncio.ensure_future(run_step(step))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return {name: task.result() for name, task in tasks.items()}
+
+    async def run_batch(
+        self,
+        texts: Sequence[str],
+        steps: Sequence[Step] = DEFAULT_PIPELINE,
+        max_concurrency: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Run the pipeline over many documents with at most ``max_concurrency`` LLM calls in flight overall."""
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        return await asyncio.gather(*(self.run_pipeline(text, steps, semaphore) for text in texts))
+
     async def run_all(self, text: str):
-        await self.summarize(text)
-        await self.translate(text)
+        # summary and translation are independent, so they run side by side
+        results = await self.run_pipeline(text)
+        print("Summary:")
+        print(results["summary"])
+        print("Translation:")
+        print(results["translation"])
+        return results
+
+    async def stream(self, function: str, metrics: Optional[StreamMetrics] = None, **arguments) -> AsyncIterator[str]:
+        """Stream the output of ``functions[function]`` chunk by chunk."""
+        source = self.kernel.invoke_stream(self.functions[function], **arguments)
+        async for text in measure_stream(source, metrics):
+            yield text
+
+    async def run_all_stream(self, text: str, target_lang: str = "French") -> Dict[str, StreamMetrics]:
+        # printed as they stream in, so one after the other
+        runs = [
+            ("summary", "Summary:", "tldr", {"input": text}),
+            ("translation", "Translation:", "translator", {"input": text, "target_lang": target_lang}),
+        ]
+        results = {}
+        for name, title, function, arguments in runs:
+            metrics = results[name] = StreamMetrics()
+            print(title)
+            async for chunk in self.stream(function, metrics, **arguments):
+                print(chunk, end="", flush=True)
+            print()
+            print(metrics.report())
+        return results
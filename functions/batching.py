@@ -0,0 +1,132 @@
+"""Pack many short inputs into one prompt-function call.
+
+``PromptBatcher`` groups consecutive inputs into batches of at most
+``max_batch_size`` items and ``max_batch_tokens`` input tokens, sends each
+batch through a ``*_batch`` prompt function (see ``functions/setup.py``) with
+every input wrapped in ``<item id="N">`` tags, and reads the answers back from
+the matching ``<result id="N">`` tags.  Items whose result is missing or
+duplicated in the reply are retried one by one through the single-item
+function, as is any input too large to share a batch.  Each batch call asks
+for ``max_tokens_per_item`` completion tokens per input it carries, so the
+budget fits the batch actually sent rather than the size the function was
+registered with.
+"""
+
+import asyncio
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from semantic_kernel.functions import KernelArguments
+
+from functions.tokens import count_tokens
+
+_RESULT_RE = re.compile(r'<result id="(\d+)">(.*?)</result>', re.DOTALL)
+
+# kind -> (batch function, single-item function)
+BATCHED_FUNCTIONS = {
+    "tldr": ("tldr_batch", "tldr"),
+    "translator": ("translator_batch", "translator"),
+}
+
+
+def format_items(texts: Sequence[str]) -> str:
+    return "\n".join(f'<item id="{i}">\n{text.strip()}\n</item>' for i, text in enumerate(texts, 1))
+
+
+def parse_results(reply: str, count: int) -> List[Optional[str]]:
+    """Per-item answers from ``reply``; ``None`` where an id is missing or repeated."""
+    found: Dict[int, List[str]] = {}
+    for item_id, text in _RESULT_RE.findall(reply):
+        found.setdefault(int(item_id), []).append(text.strip())
+    return [found[i][0] if len(found.get(i, ())) == 1 else None for i in range(1, count + 1)]
+
+
+class PromptBatcher:
+    def __init__(
+        self,
+        kernel,
+        functions,
+        max_batch_size: int = 20,
+        max_batch_tokens: int = 2000,
+        max_concurrency: int = 4,
+        max_tokens_per_item: int = 50,
+    ):
+        self.kernel = kernel
+        self.functions = functions
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrency = max_concurrency
+        self.max_tokens_per_item = max_tokens_per_item
+        self.stats = {"items": 0, "batches": 0, "single_calls": 0, "fallbacks": 0}
+
+    def plan(self, texts: Sequence[str]) -> List[List[int]]:
+        """Split input indexes into batches that respect both limits."""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        tokens = 0
+        for i, text in enumerate(texts):
+            size = count_tokens(text)
+            if current and (len(current) >= self.max_batch_size or tokens + size > self.max_batch_tokens):
+                batches.append(current)
+                current, tokens = [], 0
+            current.append(i)
+            tokens += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def _batch_arguments(self, function, count: int, arguments: Dict[str, Any]) -> KernelArguments:
+        """``arguments`` plus ``function``'s execution settings with ``max_tokens`` sized for ``count`` answers."""
+        max_tokens = self.max_tokens_per_item * count
+        settings = []
+        for setting in function.prompt_execution_settings.values():
+            if "max_tokens" in type(setting).model_fields:
+                settings.append(setting.model_copy(update={"max_tokens": max_tokens}))
+            else:  # plain PromptExecutionSettings keep service options in extension_data
+                extension_data = {**setting.extension_data, "max_tokens": max_tokens}
+                settings.append(setting.model_copy(update={"extension_data": extension_data}))
+        return KernelArguments(settings=settings or None, **arguments)
+
+    async def _single(self, function: str, text: str, arguments: Dict[str, Any]) -> str:
+        self.stats["single_calls"] += 1
+        return str(await self.kernel.invoke(self.functions[function], input=text, **arguments))
+
+    async def _batch(self, kind: str, texts: List[str], arguments: Dict[str, Any]) -> List[str]:
+        batch_function, single_function = BATCHED_FUNCTIONS[kind]
+        if len(texts) == 1:
+            return [await self._single(single_function, texts[0], arguments)]
+        self.stats["batches"] += 1
+        function = self.functions[batch_function]
+        reply = await self.kernel.invoke(
+            function, self._batch_arguments(function, len(texts), arguments), items=format_items(texts)
+        )
+        results = parse_results(str(reply), len(texts))
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            self.stats["fallbacks"] += len(missing)
+            retried = await asyncio.gather(*(self._single(single_function, texts[i], arguments) for i in missing))
+            for i, result in zip(missing, retried):
+                results[i] = result
+        return results
+
+    async def run(self, kind: str, texts: Sequence[str], **arguments: Any) -> List[str]:
+        """Run the ``kind`` function ("tldr" or "translator") over every text, in input order."""
+        texts = list(texts)
+        self.stats["items"] += len(texts)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: List[Optional[str]] = [None] * len(texts)
+
+        async def run_batch(indexes: List[int]) -> None:
+            async with semaphore:
+                outputs = await self._batch(kind, [texts[i] for i in indexes], arguments)
+            for i, output in zip(indexes, outputs):
+                results[i] = output
+
+        await asyncio.gather(*(run_batch(indexes) for indexes in self.plan(texts)))
+        return results
+
+    async def summarize_many(self, texts: Sequence[str]) -> List[str]:
+        return await self.run("tldr", texts)
+
+    async def translate_many(self, texts: Sequence[str], target_lang: str = "French") -> List[str]:
+        return await self.run("translator", texts, target_lang=target_lang)
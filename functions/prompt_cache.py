@@ -0,0 +1,239 @@
+"""Cache prompt-function results on the kernel.
+
+The same text summarized (or translated into the same language) twice costs
+two LLM calls.  ``PromptResultCache`` registers two kernel filters:
+
+* a prompt-rendering filter that, once the prompt is rendered, looks the
+  call up by ``sha256(function name + rendered prompt + model + execution
+  settings)`` and on a hit sets ``function_result``, which makes the kernel
+  skip the LLM call entirely;
+* a function-invocation filter that stores the completion text of a miss
+  after the call returns.
+
+Entries live in an in-memory LRU in front of an optional SQLite file and
+expire after ``ttl`` seconds.  Only calls that set ``temperature=0``
+explicitly and ask for a single completion are cached: an unset temperature
+means the service default, which samples, and a cached sample would replace
+every later answer.  Opt functions in by registering them with
+``temperature=0`` (see ``add_all_functions(deterministic=...)``) and listing
+them in ``functions``.  ``require_zero_temperature=False`` also caches calls
+that leave the temperature unset, for services known to default to 0.
+Streaming calls and completions containing tool calls pass straight through.
+"""
+
+import contextvars
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from semantic_kernel import Kernel
+from semantic_kernel.contents import ChatMessageContent, FunctionCallContent, TextContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+from semantic_kernel.filters import FilterTypes
+from semantic_kernel.functions.function_result import FunctionResult
+
+# (kind, texts): kind is "chat" or "text", one text per completion
+Entry = Tuple[str, List[str]]
+
+# key of the call currently being rendered, handed from the render filter to
+# the invocation filter wrapping it; one slot per invocation so nested calls
+# don't see each other's key
+_pending_key: contextvars.ContextVar[Optional[List[Optional[str]]]] = contextvars.ContextVar(
+    "prompt_cache_pending_key", default=None
+)
+
+
+class PromptResultCache:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_items: int = 1024,
+        ttl: float = 3600.0,
+        functions: Optional[Iterable[str]] = None,
+        require_zero_temperature: bool = True,
+    ):
+        self.max_items = max_items
+        self.ttl = ttl
+        # fully qualified names ("Summarizer-tldr"); None caches every prompt function
+        self.functions = set(functions) if functions is not None else None
+        self.require_zero_temperature = require_zero_temperature
+        self._memory: "OrderedDict[str, Tuple[float, Entry]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS prompt_results "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, kind TEXT NOT NULL, texts TEXT NOT NULL)"
+            )
+            self._db.commit()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "expirations": 0}
+
+    # -- storage -----------------------------------------------------------
+
+    def _remember(self, key: str, expires_at: float, entry: Entry) -> None:
+        self._memory[key] = (expires_at, entry)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Entry]:
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                if cached[0] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return cached[1]
+                del self._memory[key]
+                self.stats["expirations"] += 1
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, kind, texts FROM prompt_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[0] > now:
+                        entry = (row[1], json.loads(row[2]))
+                        self._remember(key, row[0], entry)
+                        self.stats["disk_hits"] += 1
+                        return entry
+                    self._db.execute("DELETE FROM prompt_results WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, entry: Entry) -> None:
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO prompt_results (key, expires_at, kind, texts) VALUES (?, ?, ?, ?)",
+                    (key, expires_at, entry[0], json.dumps(entry[1])),
+                )
+                self._db.commit()
+            self.stats["stores"] += 1
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from memory and disk; returns how many were removed."""
+        now = time.time()
+        with self._lock:
+            stale = [k for k, (expires_at, _) in self._memory.items() if expires_at <= now]
+            for k in stale:
+                del self._memory[k]
+            removed = len(stale)
+            if self._db is not None:
+                removed += self._db.execute("DELETE FROM prompt_results WHERE expires_at <= ?", (now,)).rowcount
+                self._db.commit()
+            self.stats["expirations"] += removed
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM prompt_results")
+                self._db.commit()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "size": len(self._memory), "max_items": self.max_items, "ttl": self.ttl}
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # -- keys --------------------------------------------------------------
+
+    def is_deterministic(self, settings) -> bool:
+        values = {**settings.extension_data, **settings.model_dump(exclude_none=True)}
+        temperature = values.get("temperature")
+        if temperature is None:
+            if self.require_zero_temperature:
+                return False
+        elif temperature > 0:
+            return False
+        return (values.get("number_of_responses") or values.get("n") or 1) <= 1
+
+    def key(self, function_name: str, rendered_prompt: str, service, settings) -> str:
+        payload = json.dumps(
+            [
+                function_name,
+                rendered_prompt,
+                getattr(service, "ai_model_id", None),
+                settings.model_dump(exclude_none=True, exclude={"service_id"}),
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # -- filters -----------------------------------------------------------
+
+    def register(self, kernel: Kernel) -> "PromptResultCache":
+        kernel.add_filter(FilterTypes.PROMPT_RENDERING, self._prompt_rendering_filter)
+        kernel.add_filter(FilterTypes.FUNCTION_INVOCATION, self._function_invocation_filter)
+        return self
+
+    async def _prompt_rendering_filter(self, context, next):
+        await next(context)
+        if context.is_streaming or context.function_result is not None:
+            return
+        name = context.function.fully_qualified_name
+        if self.functions is not None and name not in self.functions:
+            return
+        service, settings = context.kernel.select_ai_service(function=context.function, arguments=context.arguments)
+        if not self.is_deterministic(settings):
+            self.stats["bypassed"] += 1
+            return
+        key = self.key(name, context.rendered_prompt, service, settings)
+        entry = self.get(key)
+        if entry is None:
+            slot = _pending_key.get()
+            if slot is not None:
+                slot[0] = key
+            return
+        kind, texts = entry
+        if kind == "chat":
+            value = [ChatMessageContent(role=AuthorRole.ASSISTANT, content=text) for text in texts]
+        else:
+            value = [TextContent(text=text) for text in texts]
+        context.function_result = FunctionResult(
+            function=context.function.metadata,
+            value=value,
+            rendered_prompt=context.rendered_prompt,
+            metadata={"arguments": context.arguments, "prompt": context.rendered_prompt, "cached": True},
+        )
+
+    async def _function_invocation_filter(self, context, next):
+        slot: List[Optional[str]] = [None]
+        token = _pending_key.set(slot)
+        try:
+            await next(context)
+        finally:
+            _pending_key.reset(token)
+        if slot[0] is None or context.result is None:
+            return
+        entry = _entry_from(context.result.value)
+        if entry is not None:
+            self.set(slot[0], entry)
+
+
+def _entry_from(value: Any) -> Optional[Entry]:
+    if not isinstance(value, list) or not value:
+        return None
+    if all(isinstance(v, ChatMessageContent) for v in value):
+        if any(isinstance(item, FunctionCallContent) for v in value for item in v.items):
+            return None
+        return "chat", [v.content for v in value]
+    if all(isinstance(v, TextContent) for v in value):
+        return "text", [v.text for v in value]
+    return None
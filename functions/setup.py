@@ -1,24 +1,61 @@
+from typing import Iterable, Optional
+
 from semantic_kernel import Kernel
 
-def add_semantic_function(kernel: Kernel, plugin_name: str, function_name: str, prompt_template: str, max_tokens: int = 50):
+from functions.prompt_cache import PromptResultCache
+
+def add_semantic_function(kernel: Kernel, plugin_name: str, function_name: str, prompt_template: str, max_tokens: int = 50, temperature: Optional[float] = None):
+    # no temperature: the service default. temperature=0 makes answers reproducible, which PromptResultCache requires
+    settings = {} if temperature is None else {"temperature": temperature}
     return kernel.add_function(
         prompt=prompt_template,
         function_name=function_name,
         plugin_name=plugin_name, # all summarization-related functions can be under "Summarizer". Grouping functions are plugins
         max_tokens=max_tokens,
+        **settings,
     )
 
-def add_summarize_function(kernel: Kernel):
+def add_summarize_function(kernel: Kernel, temperature: Optional[float] = None):
     prompt = "{{$input}}\n\nTL;DR in one sentence:"
-    return add_semantic_function(kernel, "Summarizer", "tldr", prompt)
+    return add_semantic_function(kernel, "Summarizer", "tldr", prompt, temperature=temperature)
 
-def add_translator_function(kernel: Kernel):
+def add_translator_function(kernel: Kernel, temperature: Optional[float] = None):
     prompt = "{{$input}}\n\nTranslate this into {{$target_lang}}:"
-    return add_semantic_function(kernel, "Translator", "translator", prompt)
+    return add_semantic_function(kernel, "Translator", "translator", prompt, temperature=temperature)
+
+# max_tokens here is only the default for direct calls; PromptBatcher sizes it per batch
+def add_batch_summarize_function(kernel: Kernel, max_batch_size: int = 20, temperature: Optional[float] = None):
+    prompt = (
+        "Each item below is wrapped in <item id=\"N\"> tags.\n"
+        "Write a one-sentence TL;DR of every item. Reply with one <result id=\"N\">...</result> "
+        "per item, using the item's id, and nothing else.\n\n{{$items}}"
+    )
+    return add_semantic_function(kernel, "Summarizer", "tldr_batch", prompt, max_tokens=50 * max_batch_size, temperature=temperature)
+
+def add_batch_translator_function(kernel: Kernel, max_batch_size: int = 20, temperature: Optional[float] = None):
+    prompt = (
+        "Each item below is wrapped in <item id=\"N\"> tags.\n"
+        "Translate every item into {{$target_lang}}. Reply with one <result id=\"N\">...</result> "
+        "per item, using the item's id, and nothing else.\n\n{{$items}}"
+    )
+    return add_semantic_function(kernel, "Translator", "translator_batch", prompt, max_tokens=50 * max_batch_size, temperature=temperature)
+
+def add_all_functions(kernel: Kernel, prompt_cache: Optional[PromptResultCache] = None, deterministic: Iterable[str] = ()):
+    """Register every function; those named in ``deterministic`` (e.g. "tldr") run at temperature 0."""
+    deterministic = set(deterministic)
+
+    def temperature(name: str) -> Optional[float]:
+        return 0.0 if name in deterministic else None
 
-def add_all_functions(kernel: Kernel):
-    return {
-        "tldr": add_summarize_function(kernel),
-        "translator": add_translator_function(kernel),
+    functions = {
+        "tldr": add_summarize_function(kernel, temperature("tldr")),
+        "translator": add_translator_function(kernel, temperature("translator")),
+        # many inputs per call, see functions/batching.py
+        "tldr_batch": add_batch_summarize_function(kernel, temperature=temperature("tldr_batch")),
+        "translator_batch": add_batch_translator_function(kernel, temperature=temperature("translator_batch")),
         # Add more here as needed
-    }
\ No newline at end of file
+    }
+    if prompt_cache is not None:
+        # identical inputs are answered from the cache instead of the LLM
+        prompt_cache.register(kernel)
+    return functions
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""Time-to-first-token and throughput for streamed responses.
+
+Wrap any SK stream (``kernel.invoke_stream``, ``agent.invoke_stream``,
+``get_streaming_chat_message_contents``) in ``measure_stream`` to get its text
+chunks as they arrive while ``StreamMetrics`` records when the first
+non-empty chunk came in and how fast the rest followed.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, List, Optional
+
+from functions.tokens import count_tokens
+
+
+@dataclass
+class StreamMetrics:
+    started: float = field(default_factory=time.perf_counter)
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    chunks: int = 0
+    parts: List[str] = field(default_factory=list, repr=False)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """Seconds until the first non-empty chunk."""
+        return None if self.first_token_at is None else self.first_token_at - self.started
+
+    @property
+    def total_seconds(self) -> Optional[float]:
+        return None if self.finished_at is None else self.finished_at - self.started
+
+    @property
+    def tokens(self) -> int:
+        return count_tokens(self.text)
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Generation rate after the first token."""
+        if self.first_token_at is None or self.finished_at is None:
+            return None
+        elapsed = self.finished_at - self.first_token_at
+        return self.tokens / elapsed if elapsed > 0 else None
+
+    def as_dict(self) -> dict:
+        return {
+            "ttft_ms": None if self.ttft is None else round(self.ttft * 1000, 1),
+            "total_ms": None if self.total_seconds is None else round(self.total_seconds * 1000, 1),
+            "chunks": self.chunks,
+            "tokens": self.tokens,
+            "tokens_per_second": None if self.tokens_per_second is None else round(self.tokens_per_second, 1),
+        }
+
+    def report(self) -> str:
+        m = self.as_dict()
+        rate = "n/a" if m["tokens_per_second"] is None else f"{m['tokens_per_second']} tok/s"
+        return f"[TTFT {m['ttft_ms']} ms, {m['tokens']} tokens in {m['total_ms']} ms, {rate}]"
+
+
+def chunk_text(chunk: Any) -> str:
+    # kernel and chat-service streams yield a list of choices per chunk, agents one item
+    if isinstance(chunk, list):
+        return "".join(str(c) for c in chunk[:1])
+    return str(chunk)
+
+
+async def measure_stream(source: AsyncIterable[Any], metrics: Optional[StreamMetrics] = None) -> AsyncIterator[str]:
+    """Yield the text of every chunk of ``source``, recording timings in ``metrics``."""
+    metrics = metrics if metrics is not None else StreamMetrics()
+    try:
+        async for chunk in source:
+            text = chunk_text(chunk)
+            if not text:
+                continue
+            if metrics.first_token_at is None:
+                metrics.first_token_at = time.perf_counter()
+            metrics.chunks += 1
+            metrics.parts.append(text)
+            yield text
+    finally:
+        metrics.finished_at = time.perf_counter()
@@ -0,0 +1,29 @@
+"""Token counting for prompt budgets.
+
+Uses ``tiktoken`` when it is installed (the encoder is loaded once per
+encoding and reused); otherwise falls back to the usual ~4 characters per
+token estimate, which is close enough for deciding how much fits in a prompt.
+"""
+
+import functools
+from typing import Callable, Optional
+
+DEFAULT_ENCODING = "o200k_base"
+
+
+@functools.lru_cache(maxsize=None)
+def get_tokenizer(encoding: str = DEFAULT_ENCODING) -> Optional[Callable[[str], list]]:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding(encoding).encode_ordinary
+
+
+def count_tokens(text: Optional[str], encoding: str = DEFAULT_ENCODING) -> int:
+    if not text:
+        return 0
+    encode = get_tokenizer(encoding)
+    if encode is None:
+        return len(text) // 4 + 1
+    return len(encode(text))
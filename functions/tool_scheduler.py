@@ -0,0 +1,112 @@
+"""Scheduling for the tool calls a model requests in one turn.
+
+The chat service already starts every tool call of a turn at once; this
+auto-function-invocation filter decides how they actually run.  Calls to the
+same plugin share a semaphore (``plugin_limits``, default
+``max_concurrency``), each call gets a timeout (``timeouts`` per plugin,
+default ``timeout``), and ``cancel()`` stops calls still in flight.  A call
+that times out or is cancelled doesn't fail the whole turn: the model gets a
+short error result for it instead and the other calls keep their results.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional, Set
+
+from semantic_kernel.filters import FilterTypes
+from semantic_kernel.functions.function_result import FunctionResult
+
+
+class ToolCallScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        timeout: Optional[float] = 30.0,
+        plugin_limits: Optional[Dict[str, int]] = None,
+        timeouts: Optional[Dict[str, Optional[float]]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.plugin_limits = dict(plugin_limits or {})
+        self.timeouts = dict(timeouts or {})
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, Set[asyncio.Task]] = {}
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    def _plugin_metrics(self, plugin: str) -> Dict[str, float]:
+        m = self._metrics.get(plugin)
+        if m is None:
+            m = self._metrics[plugin] = {
+                "calls": 0, "errors": 0, "timeouts": 0, "cancelled": 0,
+                "running": 0, "max_running": 0, "wait_seconds": 0.0, "run_seconds": 0.0,
+            }
+        return m
+
+    def _semaphore(self, plugin: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(plugin)
+        if semaphore is None:
+            semaphore = self._semaphores[plugin] = asyncio.Semaphore(
+                self.plugin_limits.get(plugin, self.max_concurrency)
+            )
+        return semaphore
+
+    def register(self, kernel) -> "ToolCallScheduler":
+        if not any(f == self._auto_function_invocation_filter for _, f in kernel.auto_function_invocation_filters):
+            kernel.add_filter(FilterTypes.AUTO_FUNCTION_INVOCATION, self._auto_function_invocation_filter)
+        return self
+
+    def cancel(self, plugin: Optional[str] = None) -> int:
+        """Cancel the tool calls in flight (for one plugin, or all); returns how many."""
+        tasks = [t for name, ts in self._in_flight.items() if plugin in (None, name) for t in ts]
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    async def _auto_function_invocation_filter(self, context, next):
+        plugin = context.function.plugin_name or ""
+        m = self._plugin_metrics(plugin)
+        m["calls"] += 1
+        timeout = self.timeouts.get(plugin, self.timeout)
+        queued = time.perf_counter()
+        async with self._semaphore(plugin):
+            started = time.perf_counter()
+            m["wait_seconds"] += started - queued
+            m["running"] += 1
+            m["max_running"] = max(m["max_running"], m["running"])
+            task = asyncio.ensure_future(next(context))
+            in_flight = self._in_flight.setdefault(plugin, set())
+            in_flight.add(task)
+            try:
+                await asyncio.wait_for(asyncio.shield(task), timeout)
+            except asyncio.TimeoutError:
+                task.cancel()
+                m["timeouts"] += 1
+                self._fail(context, f"timed out after {timeout:g}s")
+            except asyncio.CancelledError:
+                task.cancel()
+                if not task.cancelled():
+                    # the whole turn was cancelled, not just this call
+                    raise
+                m["cancelled"] += 1
+                self._fail(context, "was cancelled")
+            except Exception:
+                m["errors"] += 1
+                raise
+            finally:
+                in_flight.discard(task)
+                m["running"] -= 1
+                m["run_seconds"] += time.perf_counter() - started
+
+    @staticmethod
+    def _fail(context, reason: str) -> None:
+        context.function_result = FunctionResult(
+            function=context.function.metadata,
+            value=f"The tool call {context.function.fully_qualified_name} {reason}; answer without its result.",
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "timeout": self.timeout,
+            "plugins": {name: dict(m) for name, m in self._metrics.items()},
+        }
@@ -0,0 +1,63 @@
+"""Export ``Instrumentation`` metrics as JSON or Prometheus text format."""
+
+import json
+import math
+from typing import Dict, List
+
+from instrumentation.filters import CallMetrics, Instrumentation
+from instrumentation.histograms import Histogram
+
+
+def to_json(instrumentation: Instrumentation, indent: int = 2) -> str:
+    return json.dumps(instrumentation.snapshot(), indent=indent)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _bound(value: float) -> str:
+    return "+Inf" if math.isinf(value) else repr(float(value))
+
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram) -> List[str]:
+    lines = []
+    for bound, count in zip((*histogram.bounds, math.inf), histogram.cumulative()):
+        lines.append(f'{name}_bucket{{{labels},le="{_bound(bound)}"}} {count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+def to_prometheus(instrumentation: Instrumentation, prefix: str = "sk") -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    tables: Dict[str, Dict[str, CallMetrics]] = {
+        "function": instrumentation.functions,
+        "plugin": instrumentation.plugins,
+    }
+    out: List[str] = []
+    for scope, table in tables.items():
+        base = f"{prefix}_{scope}"
+        counters = {
+            "calls_total": "Calls.",
+            "errors_total": "Calls that raised.",
+            "prompt_tokens_total": "Prompt tokens reported by the chat service.",
+            "completion_tokens_total": "Completion tokens reported by the chat service.",
+        }
+        for suffix, help_text in counters.items():
+            out.append(f"# HELP {base}_{suffix} {help_text}")
+            out.append(f"# TYPE {base}_{suffix} counter")
+            attr = suffix[: -len("_total")]
+            for key, m in table.items():
+                out.append(f'{base}_{suffix}{{{scope}="{_escape(key)}"}} {getattr(m, attr)}')
+        histograms = {
+            "duration_seconds": ("duration", "Wall time per call."),
+            "argument_bytes": ("argument_bytes", "Size of the call arguments."),
+            "result_bytes": ("result_bytes", "Size of the call result."),
+        }
+        for suffix, (attr, help_text) in histograms.items():
+            out.append(f"# HELP {base}_{suffix} {help_text}")
+            out.append(f"# TYPE {base}_{suffix} histogram")
+            for key, m in table.items():
+                out.extend(_histogram_lines(f"{base}_{suffix}", f'{scope}="{_escape(key)}"', getattr(m, attr)))
+    return "\n".join(out) + "\n"
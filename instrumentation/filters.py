@@ -0,0 +1,140 @@
+"""Per-function and per-plugin call metrics, recorded by a kernel filter.
+
+``Instrumentation.register(kernel)`` adds a function-invocation filter that
+records, for every call, wall time, the size of the arguments and of the
+result (length of their string form), token usage reported by the chat
+service and whether it raised.  Everything goes into in-process histograms
+keyed by ``plugin.function`` and rolled up by plugin; see
+``instrumentation/exporters.py`` for JSON / Prometheus output.  With
+``otel_spans=True`` each call is also wrapped in an OpenTelemetry span.
+
+When ``enabled`` is False the filter only forwards the call (one attribute
+check), so it can stay registered in production and be switched on when
+needed.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+from semantic_kernel.filters import FilterTypes
+
+from instrumentation.histograms import BYTES_BUCKETS, SECONDS_BUCKETS, Histogram
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # tracing is optional
+    otel_trace = None
+
+
+class CallMetrics:
+    __slots__ = ("calls", "errors", "prompt_tokens", "completion_tokens", "duration", "argument_bytes", "result_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.duration = Histogram(SECONDS_BUCKETS)
+        self.argument_bytes = Histogram(BYTES_BUCKETS)
+        self.result_bytes = Histogram(BYTES_BUCKETS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "duration_seconds": self.duration.snapshot(),
+            "argument_bytes": self.argument_bytes.snapshot(),
+            "result_bytes": self.result_bytes.snapshot(),
+        }
+
+
+def _usage(result) -> tuple:
+    """(prompt_tokens, completion_tokens) reported with a prompt function's completions."""
+    prompt = completion = 0
+    for metadata in result.metadata.get("metadata") or ():
+        usage = metadata.get("usage") if isinstance(metadata, dict) else None
+        if usage is not None:
+            prompt += getattr(usage, "prompt_tokens", 0) or 0
+            completion += getattr(usage, "completion_tokens", 0) or 0
+    return prompt, completion
+
+
+class Instrumentation:
+    def __init__(self, enabled: bool = True, otel_spans: bool = False):
+        self.enabled = enabled
+        self.otel_spans = otel_spans and otel_trace is not None
+        self.functions: Dict[str, CallMetrics] = {}
+        self.plugins: Dict[str, CallMetrics] = {}
+        self._lock = threading.Lock()
+        self._tracer = otel_trace.get_tracer(__name__) if otel_trace is not None else None
+
+    def register(self, kernel) -> "Instrumentation":
+        kernel.add_filter(FilterTypes.FUNCTION_INVOCATION, self._function_invocation_filter)
+        return self
+
+    def _metrics(self, table: Dict[str, CallMetrics], key: str) -> CallMetrics:
+        m = table.get(key)
+        if m is None:
+            with self._lock:
+                m = table.setdefault(key, CallMetrics())
+        return m
+
+    async def _function_invocation_filter(self, context, next):
+        if not self.enabled:
+            await next(context)
+            return
+        function = context.function
+        name = function.fully_qualified_name
+        if self.otel_spans:
+            with self._tracer.start_as_current_span(f"function {name}") as span:
+                span.set_attribute("function.plugin", function.plugin_name or "")
+                await self._record(context, next, name)
+        else:
+            await self._record(context, next, name)
+
+    async def _record(self, context, next, name: str) -> None:
+        plugin = context.function.plugin_name or ""
+        argument_bytes = sum(len(str(v)) for v in context.arguments.values()) if context.arguments else 0
+        error = False
+        started = time.perf_counter()
+        try:
+            await next(context)
+        except BaseException:
+            error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            result = context.result
+            result_bytes = 0
+            prompt_tokens = completion_tokens = 0
+            if result is not None and not error:
+                if not hasattr(result.value, "__aiter__"):  # streamed results aren't consumed yet
+                    result_bytes = len(str(result))
+                prompt_tokens, completion_tokens = _usage(result)
+            for m in (self._metrics(self.functions, name), self._metrics(self.plugins, plugin)):
+                m.calls += 1
+                m.errors += error
+                m.prompt_tokens += prompt_tokens
+                m.completion_tokens += completion_tokens
+                m.duration.observe(elapsed)
+                m.argument_bytes.observe(argument_bytes)
+                m.result_bytes.observe(result_bytes)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.functions.clear()
+            self.plugins.clear()
+
+    def hottest(self, n: int = 5, by: str = "plugins") -> list:
+        """The ``n`` plugins (or functions) with the most total wall time."""
+        table = getattr(self, by)
+        return sorted(((k, m.duration.sum) for k, m in table.items()), key=lambda kv: kv[1], reverse=True)[:n]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "functions": {k: m.snapshot() for k, m in self.functions.items()},
+            "plugins": {k: m.snapshot() for k, m in self.plugins.items()},
+        }
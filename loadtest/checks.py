@@ -0,0 +1,214 @@
+"""Offline checks of behaviour the benchmarks depend on.
+
+Each check drives a real flow against the in-process fake Azure OpenAI
+service (loadtest/fake_azure.py), raises ``CheckFailed`` when
+the behaviour is wrong and otherwise returns what it measured.  Run them
+with ``python main.py check``.
+"""
+
+import asyncio
+from typing import Annotated, Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+from semantic_kernel import Kernel
+from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+from semantic_kernel.connectors.ai.open_ai import OpenAIChatPromptExecutionSettings
+from semantic_kernel.contents import ChatHistory
+from semantic_kernel.functions import kernel_function
+
+from config.service_registry import registry
+from functions.tool_scheduler import ToolCallScheduler
+from loadtest.fake_azure import FakeServiceConfig
+from loadtest.targets import TEXT, use_fake_service
+
+
+class CheckFailed(AssertionError):
+    pass
+
+
+def expect(condition: bool, message: str) -> None:
+    # not ``assert``: checks must still check under ``python -O``
+    if not condition:
+        raise CheckFailed(message)
+
+
+async def prompt_cache_check() -> Dict[str, Any]:
+    """Only explicit ``temperature=0`` calls are answered from the cache."""
+    from config.kernal_config import create_kernel
+    from functions.prompt_cache import PromptResultCache
+    from functions.setup import add_all_functions, add_semantic_function
+
+    transport = use_fake_service()
+    cache = PromptResultCache()
+    try:
+        kernel = create_kernel(registry.chat_completion())
+        functions = add_all_functions(kernel, prompt_cache=cache, deterministic=("tldr",))
+        # the same prompt without a temperature (service default, as registered by default) and with sampling
+        unset = add_semantic_function(kernel, "Summarizer", "tldr_unset", "{{$input}}\n\nTL;DR in one sentence:")
+        sampled = add_semantic_function(
+            kernel, "Summarizer", "tldr_sampled", "{{$input}}\n\nTL;DR in one sentence:", temperature=0.7
+        )
+        calls: Dict[str, int] = {}
+        for name, function in (("temperature=0", functions["tldr"]), ("unset", unset), ("temperature=0.7", sampled)):
+            before = transport.stats["chat"]
+            for _ in range(3):
+                await kernel.invoke(function, input=TEXT)
+            calls[name] = transport.stats["chat"] - before
+        expect(calls["temperature=0"] == 1, f"temperature=0 should call the service once, called {calls['temperature=0']}")
+        expect(calls["unset"] == 3, f"an unset temperature must not be cached, called {calls['unset']}")
+        expect(calls["temperature=0.7"] == 3, f"sampled calls must not be cached, called {calls['temperature=0.7']}")
+        registered = {
+            name: settings.extension_data.get("temperature")
+            for name, function in functions.items()
+            for settings in function.prompt_execution_settings.values()
+        }
+        expect(
+            registered == {"tldr": 0.0, "translator": None, "tldr_batch": None, "translator_batch": None},
+            f"only the functions opted in may run at temperature 0: {registered}",
+        )
+        return {"service_calls_per_3_invocations": calls, "cache": cache.snapshot()}
+    finally:
+        cache.close()
+        await registry.aclose()
+        registry.use_transport(None)
+
+
+class ProbePlugin:
+    """Tools that just wait, counting how many of their calls run at once."""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+
+    @kernel_function(description="Wait for a while.")
+    async def nap(self, seconds: Annotated[float, "How long to wait."]) -> str:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.running -= 1
+        return f"slept {seconds:g}s"
+
+
+def _one_turn_script(calls: List[Tuple[str, Dict[str, Any]]]):
+    """A scripted model that makes ``calls`` in one turn, then answers with their results."""
+    def script(messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]):
+        results = [str(m.get("content")) for m in messages if m.get("role") == "tool"]
+        return " | ".join(results) if results else calls
+    return script
+
+
+async def _tool_turn(
+    scheduler: ToolCallScheduler, calls: List[Tuple[str, Dict[str, Any]]]
+) -> Tuple[str, Dict[str, ProbePlugin]]:
+    """One model turn making ``calls`` on fresh Fast and Slow probe plugins; returns the final reply."""
+    kernel = Kernel()
+    plugins = {"Fast": ProbePlugin(), "Slow": ProbePlugin()}
+    for name, plugin in plugins.items():
+        kernel.add_plugin(plugin, plugin_name=name)
+    scheduler.register(kernel)
+    history = ChatHistory()
+    history.add_user_message("Run the tools.")
+    settings = OpenAIChatPromptExecutionSettings(function_choice_behavior=FunctionChoiceBehavior.Auto())
+    use_fake_service(FakeServiceConfig(latency=0.0, token_latency=0.0, jitter=0.0, script=_one_turn_script(calls)))
+    try:
+        reply = await registry.chat_completion().get_chat_message_content(
+            chat_history=history, settings=settings, kernel=kernel
+        )
+    finally:
+        await registry.aclose()
+        registry.use_transport(None)
+    return str(reply), plugins
+
+
+async def tool_scheduler_check() -> Dict[str, Any]:
+    """Per-plugin limits hold, timed-out calls come back as errors, and ``cancel()`` leaves nothing running."""
+    report: Dict[str, Any] = {}
+
+    # six calls to each plugin in one turn, Slow limited to 2 at a time and Fast to 4
+    scheduler = ToolCallScheduler(max_concurrency=4, plugin_limits={"Slow": 2})
+    calls = [(f"{name}-nap", {"seconds": 0.05}) for name in ("Fast", "Slow") for _ in range(6)]
+    _, plugins = await _tool_turn(scheduler, calls)
+    running = {name: plugin.max_running for name, plugin in plugins.items()}
+    expect(running == {"Fast": 4, "Slow": 2}, f"expected at most 4 Fast and 2 Slow calls at once, saw {running}")
+    expect(
+        {name: m["max_running"] for name, m in scheduler.metrics()["plugins"].items()} == running,
+        "the scheduler's max_running disagrees with the tools",
+    )
+    report["max_running"] = running
+
+    # a Slow call past its plugin's timeout is answered with an error; the Fast call keeps its result
+    scheduler = ToolCallScheduler(timeouts={"Slow": 0.05})
+    reply, _ = await _tool_turn(scheduler, [("Fast-nap", {"seconds": 0.01}), ("Slow-nap", {"seconds": 5})])
+    expect("Slow-nap timed out after 0.05s" in reply, f"no timeout result for the slow call: {reply!r}")
+    expect("slept 0.01s" in reply, f"the fast call lost its result: {reply!r}")
+    expect(scheduler.metrics()["plugins"]["Slow"]["timeouts"] == 1, "the timeout was not counted")
+    report["timeout_reply"] = reply
+
+    # cancel() mid-turn: every call is answered as cancelled and no task is left running
+    scheduler = ToolCallScheduler()
+    turn = asyncio.ensure_future(_tool_turn(scheduler, [("Slow-nap", {"seconds": 30})] * 3))
+    for _ in range(200):
+        if sum(len(ts) for ts in scheduler._in_flight.values()) == 3:
+            break
+        await asyncio.sleep(0.005)
+    tasks = [t for ts in scheduler._in_flight.values() for t in ts]
+    cancelled = scheduler.cancel()
+    reply, _ = await asyncio.wait_for(turn, 5)
+    expect(cancelled == 3, f"cancel() should have stopped 3 calls, stopped {cancelled}")
+    expect(reply.count("was cancelled") == 3, f"expected 3 cancelled results: {reply!r}")
+    expect(all(t.done() for t in tasks), "a cancelled tool call is still running")
+    expect(not any(scheduler._in_flight.values()), "cancelled calls are still tracked as in flight")
+    left = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    expect(not left, f"tasks left running after cancel(): {left}")
+    report["cancelled"] = cancelled
+    report["metrics"] = scheduler.metrics()
+    return report
+
+
+async def weather_tools_check() -> Dict[str, Any]:
+    """The batch weather tool answers a multi-city question in fewer tool calls and round trips."""
+    from loadtest.tool_call_bench import tool_call_bench
+    from plugins.weather_plugin import MAX_REPORT_LOCATIONS, WeatherPlugin
+
+    modes = (await tool_call_bench())["modes"]
+    batch = modes["batch tool"]
+    for name, single in modes.items():
+        if name == "batch tool":
+            continue
+        expect(
+            batch["tool_calls"] < single["tool_calls"],
+            f"the batch tool made {batch['tool_calls']} tool calls, {name} {single['tool_calls']}",
+        )
+        expect(
+            batch["model_requests"] <= single["model_requests"],
+            f"the batch tool took {batch['model_requests']} model requests, {name} {single['model_requests']}",
+        )
+
+    # cities past the per-call limit are named in the report instead of dropped
+    cities = [f"City {i}" for i in range(MAX_REPORT_LOCATIONS + 2)]
+    report = (await WeatherPlugin().get_weather_report(cities)).splitlines()
+    expect(len(report) == MAX_REPORT_LOCATIONS + 1, f"expected {MAX_REPORT_LOCATIONS} cities and a truncation line")
+    expect(
+        report[-1].startswith("truncated") and report[-1].endswith(", ".join(cities[MAX_REPORT_LOCATIONS:])),
+        f"the cities over the limit are not reported: {report[-1]!r}",
+    )
+    return {"modes": modes, "truncation_line": report[-1]}
+
+
+CHECKS: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]] = {
+    "prompt-cache": prompt_cache_check,
+    "tool-scheduler": tool_scheduler_check,
+    "weather-tools": weather_tools_check,
+}
+
+
+def run_checks(names: Sequence[str] = tuple(CHECKS)) -> Dict[str, Any]:
+    """Run ``names`` in order; each result is what the check measured or its failure message."""
+    results: Dict[str, Any] = {}
+    for name in names:
+        try:
+            results[name] = {"ok": True, **asyncio.run(CHECKS[name]())}
+        except CheckFailed as exc:
+            results[name] = {"ok": False, "error": str(exc)}
+    return results
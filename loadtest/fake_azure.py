@@ -0,0 +1,270 @@
+"""An in-process stand-in for the Azure OpenAI REST API.
+
+``FakeAzureOpenAITransport`` is an ``httpx`` transport that answers chat
+completion (plain and streamed) and embedding requests itself, so the real
+``AzureChatCompletion`` / ``AzureTextEmbedding`` clients - request building,
+JSON and SSE parsing, the kernel's function-calling loop - can be driven
+without credentials or network:
+
+    registry.use_transport(FakeAzureOpenAITransport(FakeServiceConfig(latency=0.2)))
+
+Responses take ``latency`` seconds (with ``jitter``) to the first token and
+``token_latency`` per token after that, at most ``capacity`` requests are
+served at once (the rest queue), and ``rpm_limit`` / ``fail_rate`` answer
+with 429 and a Retry-After header.  A ``script`` sees the request's messages
+and tools and returns the reply text or the tool calls to make, as
+``(function_name, arguments)`` pairs; without one (or when it returns None)
+the reply is ``reply_words`` words of filler.  ``stats`` also counts the tool
+calls asked for and a token estimate of the prompts (messages plus tool
+schemas), so benchmarks can compare what a plugin design costs.
+"""
+
+import asyncio
+import base64
+import json
+import random
+import struct
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+from functions.tokens import count_tokens
+
+ToolCall = Tuple[str, Dict[str, Any]]
+RawScript = Callable[[List[Dict[str, Any]], List[Dict[str, Any]]], Union[None, str, Sequence[ToolCall]]]
+
+FILLER = (
+    "Semantic Kernel is a lightweight open source development kit that lets you build AI agents "
+    "and integrate the latest models into your codebase as efficient middleware"
+).split()
+
+
+@dataclass
+class FakeServiceConfig:
+    latency: float = 0.1
+    token_latency: float = 0.005
+    jitter: float = 0.2
+    capacity: Optional[int] = None
+    rpm_limit: Optional[int] = None
+    fail_rate: float = 0.0
+    retry_after: float = 1.0
+    reply_words: int = 30
+    dimensions: int = 256
+    script: Optional[RawScript] = None
+    seed: int = 0
+
+
+class FakeAzureOpenAITransport(httpx.AsyncBaseTransport):
+    def __init__(self, config: Optional[FakeServiceConfig] = None):
+        self.config = config or FakeServiceConfig()
+        self._random = random.Random(self.config.seed)
+        self._capacity = asyncio.Semaphore(self.config.capacity) if self.config.capacity else None
+        self._window: deque = deque()  # start times of the last minute's requests
+        self.in_flight = 0
+        self.stats = {
+            "requests": 0, "chat": 0, "streamed": 0, "embeddings": 0,
+            "tool_call_replies": 0, "tool_calls": 0, "prompt_tokens": 0, "tool_schema_tokens": 0,
+            "rate_limited": 0, "max_in_flight": 0,
+        }
+
+    # -- transport -----------------------------------------------------------
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats["requests"] += 1
+        body = json.loads(await request.aread() or b"{}")
+        path = request.url.path
+        if not (path.endswith("/chat/completions") or path.endswith("/embeddings")):
+            return httpx.Response(404, json={"error": {"code": "NotFound", "message": path}})
+        limited = self._rate_limited()
+        if limited is not None:
+            return limited
+        if path.endswith("/embeddings"):
+            return await self._served(self._embeddings(body))
+        if body.get("stream"):
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=self._stream(body))
+        return await self._served(self._chat(body))
+
+    def _rate_limited(self) -> Optional[httpx.Response]:
+        now = time.monotonic()
+        while self._window and now - self._window[0] > 60:
+            self._window.popleft()
+        over_limit = self.config.rpm_limit is not None and len(self._window) >= self.config.rpm_limit
+        if over_limit or (self.config.fail_rate and self._random.random() < self.config.fail_rate):
+            self.stats["rate_limited"] += 1
+            retry_after = self.config.retry_after
+            if over_limit:
+                retry_after = max(retry_after, 60 - (now - self._window[0]))
+            return httpx.Response(
+                429,
+                headers={"retry-after": f"{retry_after:.0f}", "retry-after-ms": f"{retry_after * 1000:.0f}"},
+                json={"error": {"code": "429", "message": "Rate limit is exceeded."}},
+            )
+        self._window.append(now)
+        return None
+
+    async def _served(self, work) -> httpx.Response:
+        """Run ``work`` within the service's capacity, counting it as in flight."""
+        if self._capacity is None:
+            return await self._counted(work)
+        async with self._capacity:
+            return await self._counted(work)
+
+    async def _counted(self, work):
+        self.in_flight += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.in_flight)
+        try:
+            return await work
+        finally:
+            self.in_flight -= 1
+
+    def _delay(self, seconds: float) -> float:
+        return max(seconds * (1 + self._random.uniform(-self.config.jitter, self.config.jitter)), 0.0)
+
+    # -- replies -------------------------------------------------------------
+
+    def _reply(self, body: Dict[str, Any]) -> Union[str, Sequence[ToolCall]]:
+        tool_tokens = self._tool_tokens(body)
+        self.stats["prompt_tokens"] += self._message_tokens(body) + tool_tokens
+        self.stats["tool_schema_tokens"] = max(self.stats["tool_schema_tokens"], tool_tokens)
+        reply = None
+        if self.config.script is not None:
+            reply = self.config.script(body.get("messages", []), body.get("tools") or [])
+        if reply is None:
+            words = self.config.reply_words
+            return " ".join(FILLER[i % len(FILLER)] for i in range(words)) + "."
+        if not isinstance(reply, str):
+            self.stats["tool_calls"] += len(reply)
+        return reply
+
+    @staticmethod
+    def _tool_calls(calls: Sequence[ToolCall], turn: int) -> List[Dict[str, Any]]:
+        return [
+            {"id": f"call_{turn}_{i}", "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}
+            for i, (name, args) in enumerate(calls)
+        ]
+
+    @staticmethod
+    def _message_tokens(body: Dict[str, Any]) -> int:
+        """Messages' text, tool calls and tool results."""
+        parts = []
+        for m in body.get("messages", []):
+            parts.append(str(m.get("content") or ""))
+            parts.extend(f"{c['function']['name']}({c['function']['arguments']})" for c in m.get("tool_calls") or ())
+        return count_tokens(" ".join(p for p in parts if p))
+
+    @staticmethod
+    def _tool_tokens(body: Dict[str, Any]) -> int:
+        """The tool schemas sent with the request."""
+        tools = body.get("tools")
+        return count_tokens(json.dumps(tools, separators=(",", ":"))) if tools else 0
+
+    def _usage(self, body: Dict[str, Any], completion: str) -> Dict[str, int]:
+        prompt = self._message_tokens(body) + self._tool_tokens(body)
+        completion_tokens = len(completion.split())
+        return {"prompt_tokens": prompt, "completion_tokens": completion_tokens, "total_tokens": prompt + completion_tokens}
+
+    def _envelope(self, body: Dict[str, Any], obj: str, choices: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "id": f"chatcmpl-{self.stats['requests']}",
+            "object": obj,
+            "created": int(time.time()),
+            "model": body.get("model") or "fake",
+            "choices": choices,
+        }
+
+    async def _chat(self, body: Dict[str, Any]) -> httpx.Response:
+        self.stats["chat"] += 1
+        reply = self._reply(body)
+        if isinstance(reply, str):
+            await asyncio.sleep(self._delay(self.config.latency + self.config.token_latency * len(reply.split())))
+            message = {"role": "assistant", "content": reply}
+            finish_reason = "stop"
+        else:
+            self.stats["tool_call_replies"] += 1
+            await asyncio.sleep(self._delay(self.config.latency))
+            message = {"role": "assistant", "content": None, "tool_calls": self._tool_calls(reply, self.stats["chat"])}
+            finish_reason = "tool_calls"
+        payload = self._envelope(body, "chat.completion", [{"index": 0, "message": message, "finish_reason": finish_reason}])
+        payload["usage"] = self._usage(body, reply if isinstance(reply, str) else "")
+        return httpx.Response(200, json=payload)
+
+    async def _stream(self, body: Dict[str, Any]) -> AsyncIterator[bytes]:
+        if self._capacity is not None:
+            await self._capacity.acquire()
+        self.in_flight += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.in_flight)
+        done = False
+
+        def finish() -> None:
+            nonlocal done
+            if not done:
+                done = True
+                self.in_flight -= 1
+                if self._capacity is not None:
+                    self._capacity.release()
+
+        try:
+            self.stats["chat"] += 1
+            self.stats["streamed"] += 1
+            reply = self._reply(body)
+            await asyncio.sleep(self._delay(self.config.latency))
+
+            def event(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> bytes:
+                chunk = self._envelope(
+                    body, "chat.completion.chunk", [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                )
+                return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+            if isinstance(reply, str):
+                for i, word in enumerate(reply.split()):
+                    if i:
+                        await asyncio.sleep(self._delay(self.config.token_latency))
+                    yield event({"role": "assistant", "content": word if i == 0 else " " + word})
+                yield event({}, "stop")
+            else:
+                self.stats["tool_call_replies"] += 1
+                calls = self._tool_calls(reply, self.stats["chat"])
+                yield event({"role": "assistant", "tool_calls": [{"index": i, **c} for i, c in enumerate(calls)]})
+                yield event({}, "tool_calls")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                usage = self._envelope(body, "chat.completion.chunk", [])
+                usage["usage"] = self._usage(body, reply if isinstance(reply, str) else "")
+                yield f"data: {json.dumps(usage)}\n\n".encode("utf-8")
+            # clients stop reading at [DONE] without closing the generator, so finish first
+            finish()
+            yield b"data: [DONE]\n\n"
+        finally:
+            finish()
+
+    def embed(self, text: str) -> List[float]:
+        """A unit vector that depends only on ``text``."""
+        rng = random.Random(zlib.crc32(text.encode("utf-8")))
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.config.dimensions)]
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    async def _embeddings(self, body: Dict[str, Any]) -> httpx.Response:
+        self.stats["embeddings"] += 1
+        inputs = body.get("input") or []
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        await asyncio.sleep(self._delay(self.config.latency))
+        data = []
+        for i, text in enumerate(inputs):
+            vector = self.embed(str(text))
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+        tokens = sum(len(str(t)) for t in inputs) // 4 + 1
+        return httpx.Response(200, json={
+            "object": "list",
+            "data": data,
+            "model": body.get("model") or "fake",
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "in_flight": self.in_flight}
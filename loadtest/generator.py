@@ -0,0 +1,134 @@
+"""Open-loop load generator.
+
+``run_load(target, rps, duration)`` starts a call of ``target()`` every
+``1 / rps`` seconds (or at Poisson-distributed times), whether or not earlier
+calls have finished, the way independent users arrive.  A call that would
+exceed ``max_in_flight`` is counted as dropped instead of started, so an
+overloaded target shows up as drops and growing latency rather than as a
+generator that quietly slows down.
+
+While it runs, ``LoopLagMonitor`` sleeps in short intervals and records how
+late it wakes up: that lateness is time the event loop spent on something
+else (JSON parsing, template rendering, blocking calls), and it delays every
+coroutine on the loop.
+
+The report has throughput, latency percentiles (and time to first token for
+targets that return ``StreamMetrics``), errors by type and loop lag.
+"""
+
+import asyncio
+import math
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from functions.streaming import StreamMetrics
+
+Target = Callable[[], Awaitable[Any]]
+
+
+def percentiles(samples: List[float], points=(50, 90, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles of ``samples`` in milliseconds, plus mean and max."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    result = {f"p{p}": ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)] * 1000 for p in points}
+    result["mean"] = sum(ordered) / len(ordered) * 1000
+    result["max"] = ordered[-1] * 1000
+    return {k: round(v, 2) for k, v in result.items()}
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(loop.time() - expected, 0.0))
+
+    def start(self) -> "LoopLagMonitor":
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def report(self) -> Dict[str, float]:
+        return percentiles(self.samples, points=(50, 99))
+
+
+async def run_load(
+    target: Target,
+    rps: float,
+    duration: float,
+    max_in_flight: int = 1000,
+    poisson: bool = False,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Call ``target`` at ``rps`` for ``duration`` seconds and wait for the calls to finish."""
+    latencies: List[float] = []
+    ttfts: List[float] = []
+    errors: Dict[str, int] = {}
+    in_flight = set()
+    dropped = 0
+    rng = random.Random(seed)
+
+    async def call() -> None:
+        started = time.perf_counter()
+        try:
+            result = await target()
+        except Exception as exc:
+            errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+            return
+        latencies.append(time.perf_counter() - started)
+        if isinstance(result, StreamMetrics) and result.ttft is not None:
+            ttfts.append(result.ttft)
+
+    monitor = LoopLagMonitor().start()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    next_at = started
+    sent = 0
+    while next_at - started < duration:
+        delay = next_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            dropped += 1
+        else:
+            task = asyncio.ensure_future(call())
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            sent += 1
+        next_at += rng.expovariate(rps) if poisson else 1.0 / rps
+    sending = loop.time() - started
+    if in_flight:
+        await asyncio.wait(list(in_flight))
+    elapsed = loop.time() - started
+    await monitor.stop()
+
+    completed = len(latencies)
+    return {
+        "target_rps": rps,
+        "offered_rps": round(sent / sending, 2) if sending else 0.0,
+        "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+        "sent": sent,
+        "completed": completed,
+        "errors": errors,
+        "dropped": dropped,
+        "seconds": round(elapsed, 3),
+        "latency_ms": percentiles(latencies),
+        "ttft_ms": percentiles(ttfts),
+        "loop_lag_ms": monitor.report(),
+    }
@@ -0,0 +1,176 @@
+"""The repo's flows as load-test targets, served by the in-process fake service.
+
+``use_fake_service()`` points ``config.service_registry.registry`` - and with
+it every agent, kernel and orchestrator built from it - at a
+``FakeAzureOpenAITransport`` and fills in placeholder Azure settings, so no
+credentials are needed and nothing leaves the process.  ``build_targets()``
+returns one zero-argument coroutine function per flow; ``load_test()`` runs
+``loadtest.generator.run_load`` over the chosen ones.
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+from loadtest.fake_azure import FakeAzureOpenAITransport, FakeServiceConfig
+from config.rate_limiter import LLMScheduler
+from config.service_registry import registry
+from functions.streaming import StreamMetrics
+from loadtest.generator import Target, run_load
+from plugins.weather_engine import TEMPERATURE_RANGES
+
+FAKE_ENV = {
+    "AZURE_OPENAI_ENDPOINT": "https://fake.openai.azure.com/",
+    "AZURE_OPENAI_CHAT_DEPLOYMENT_NAME": "fake-chat",
+    "AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME": "fake-embedding",
+    "AZURE_OPENAI_API_KEY": "fake-key",
+}
+
+TEXT = (
+    "Semantic Kernel is a lightweight, open-source development kit that lets you easily build AI agents "
+    "and integrate the latest AI models into your C#, Python, or Java codebase."
+)
+QUESTION = "What's the capital of France?"
+WEATHER_QUESTION = "What's the weather like in Tokyo, Paris and London and are there any alerts?"
+
+TARGETS = ("functions", "simple", "specialized", "weather", "embeddings")
+
+
+def weather_script(cities: Optional[Sequence[str]] = None, parallel: bool = True):
+    """A scripted model that asks for the weather and alerts of ``cities``, then sums up the results.
+
+    Without ``cities`` it takes the known cities named in the last user message.
+    With the batch tool on offer it makes one call.  Otherwise it calls
+    get_current_weather and get_weather_alert per city, either all in one turn
+    (``parallel``) or one city per turn, as many models do.  Returns None (filler)
+    when there is nothing to call and no tool result to sum up.
+    """
+    def script(messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]):
+        names = [t["function"]["name"] for t in tools]
+        asked = cities
+        if asked is None:
+            question = next((str(m.get("content") or "") for m in reversed(messages) if m.get("role") == "user"), "")
+            asked = [c for c in TEMPERATURE_RANGES if c != "Default" and c in question]
+        if "Weather-get_weather_report" in names:
+            turns = [[("Weather-get_weather_report", {"locations": list(asked), "fields": "now,alerts"})]]
+        else:
+            turns = [
+                [("Weather-get_current_weather", {"location": c}), ("Weather-get_weather_alert", {"location": c})]
+                for c in asked
+            ]
+            if parallel:
+                turns = [[call for turn in turns for call in turn]]
+        done = sum(1 for m in messages if m.get("role") == "assistant" and m.get("tool_calls"))
+        if names and asked and done < len(turns):
+            return turns[done]
+        results = [str(m.get("content")) for m in messages if m.get("role") == "tool"]
+        if results:
+            return "Here is the weather. " + " ".join(results)
+        return None
+    return script
+
+
+def use_fake_service(config: Optional[FakeServiceConfig] = None) -> FakeAzureOpenAITransport:
+    """Send every registry service through a new fake; call before anything uses the registry."""
+    os.environ.update(FAKE_ENV)
+    config = config or FakeServiceConfig()
+    if config.script is None:
+        config.script = weather_script()
+    transport = FakeAzureOpenAITransport(config)
+    registry.use_transport(transport)
+    return transport
+
+
+def build_targets(stream: bool = False) -> Dict[str, Target]:
+    from agents.simple_agent import get_simple_agent, stream_simple_agent
+    from agents.specialized_agent import generate_specialized_agent, stream_specialized_agent
+    from config.kernal_config import create_kernel
+    from function_orchestrator import SemanticOrchestrator
+    from functions.setup import add_all_functions
+    from plugin_orchestrator import stream_weather_report_plugin, weather_report_plugin
+
+    chat_completion = registry.chat_completion()
+    kernel = create_kernel(chat_completion)
+    orchestrator = SemanticOrchestrator(kernel, add_all_functions(kernel))
+
+    async def drain(source) -> None:
+        async for _ in source:
+            pass
+
+    async def functions():
+        if not stream:
+            return await orchestrator.run_pipeline(TEXT)
+        metrics = StreamMetrics()
+        await drain(orchestrator.stream("tldr", metrics, input=TEXT))
+        return metrics
+
+    async def simple():
+        if not stream:
+            return await get_simple_agent().get_response(messages=QUESTION)
+        metrics = StreamMetrics()
+        await drain(stream_simple_agent(QUESTION, metrics))
+        return metrics
+
+    async def specialized():
+        if not stream:
+            agent = generate_specialized_agent("python_programming", "friendly", "short")
+            return await agent.get_response(messages="Write me a hello world example")
+        metrics = StreamMetrics()
+        await drain(stream_specialized_agent(
+            "python_programming", "friendly", "short", "Write me a hello world example", metrics
+        ))
+        return metrics
+
+    async def weather():
+        # a kernel per request: the plugin flow registers its plugin on the kernel it is given
+        weather_kernel = create_kernel(chat_completion)
+        if not stream:
+            return await weather_report_plugin(weather_kernel, chat_completion, WEATHER_QUESTION)
+        metrics = StreamMetrics()
+        await drain(stream_weather_report_plugin(weather_kernel, chat_completion, WEATHER_QUESTION, metrics))
+        return metrics
+
+    async def embeddings():
+        return await registry.text_embedding().generate_embeddings([TEXT, QUESTION])
+
+    return {
+        "functions": functions,
+        "simple": simple,
+        "specialized": specialized,
+        "weather": weather,
+        "embeddings": embeddings,
+    }
+
+
+async def load_test(
+    targets: Sequence[str] = TARGETS,
+    rps: float = 10.0,
+    duration: float = 10.0,
+    stream: bool = False,
+    config: Optional[FakeServiceConfig] = None,
+    max_in_flight: int = 1000,
+    poisson: bool = False,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Drive each of ``targets`` in turn at ``rps`` against the fake service.
+
+    With ``requests_per_minute`` / ``tokens_per_minute`` every call goes through an
+    ``LLMScheduler`` with those limits (set ``config.rpm_limit`` to see it handle 429s).
+    """
+    transport = use_fake_service(config)
+    if requests_per_minute or tokens_per_minute:
+        registry.use_scheduler(LLMScheduler(requests_per_minute, tokens_per_minute))
+    try:
+        available = build_targets(stream)
+        report: Dict[str, Any] = {"stream": stream, "targets": {}}
+        for name in targets:
+            before = dict(transport.stats)
+            result = await run_load(available[name], rps, duration, max_in_flight, poisson)
+            result["service_requests"] = transport.stats["requests"] - before["requests"]
+            report["targets"][name] = result
+        report["fake_service"] = transport.snapshot()
+        report["registry"] = registry.stats()
+        return report
+    finally:
+        await registry.aclose()
+        registry.use_transport(None)
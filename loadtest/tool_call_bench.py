@@ -0,0 +1,57 @@
+"""How many tool calls, model round trips and prompt tokens a tool design costs.
+
+``tool_call_bench()`` asks ``plugin_orchestrator.weather_report_plugin`` one
+multi-city question against the fake Azure OpenAI service, driven by
+``loadtest.targets.weather_script``, once per way of offering the weather
+tools: the single-city functions answered one city per turn, the same
+functions called in parallel, and the batch ``get_weather_report`` function.
+The fake answers instantly and nothing leaves the process, so the numbers
+depend only on the plugin design.
+"""
+
+import time
+from typing import Dict, Sequence
+
+from semantic_kernel import Kernel
+
+from config.service_registry import registry
+from loadtest.fake_azure import FakeServiceConfig
+from loadtest.targets import use_fake_service, weather_script
+from plugin_orchestrator import weather_report_plugin
+
+BENCH_CITIES = ["New York", "London", "Tokyo", "Sydney", "Paris"]
+
+
+async def tool_call_bench(cities: Sequence[str] = BENCH_CITIES) -> Dict:
+    """Tool calls, model round trips and prompt tokens for one multi-city question, per tool design.
+
+    Runs weather_report_plugin offline against a scripted fake service.  The
+    one-city-per-turn mode needs a model request per city, so keep ``cities``
+    within the kernel's auto-invoke limit (5).
+    """
+    message = f"What's the weather like in {', '.join(cities)} and are there any alerts?"
+    modes = {
+        "single-city tools, one city per turn": (False, False),
+        "single-city tools, parallel calls": (False, True),
+        "batch tool": (True, True),
+    }
+    report = {"cities": list(cities), "modes": {}}
+    for name, (batch_tools, parallel) in modes.items():
+        config = FakeServiceConfig(latency=0.0, token_latency=0.0, jitter=0.0, script=weather_script(cities, parallel))
+        transport = use_fake_service(config)
+        try:
+            started = time.perf_counter()
+            await weather_report_plugin(Kernel(), registry.chat_completion(), message, batch_tools=batch_tools)
+            seconds = time.perf_counter() - started
+        finally:
+            await registry.aclose()
+            registry.use_transport(None)
+        stats = transport.stats
+        report["modes"][name] = {
+            "model_requests": stats["chat"],
+            "tool_calls": stats["tool_calls"],
+            "prompt_tokens": stats["prompt_tokens"],
+            "tool_schema_tokens": stats["tool_schema_tokens"],
+            "seconds": round(seconds, 4),
+        }
+    return report
@@ -1,42 +1,340 @@
-from agents.agent_plugin import notes_agent_example
-from agents.keeping_length_in_check import keeping_length_in_check_example
-from agents.multi_turn_agent import multi_turn_agent_example
-from agents.simple_agent import simple_agent_example
-from agents.specialized_agent import specialized_agent_example
-from config.env_loader import load_env_vars
+"""Run one example scenario.
+
+    python main.py                      # same as: python main.py notes
+    python main.py notes
+    python main.py functions --stream
+    python main.py weather --message "Weather in Paris and Tokyo?"
+    python main.py multi-turn --thread-id thread_...
+    python main.py import-report weather --top 15
+    python main.py startup-bench --runs 5 --max-ms 4000 --out startup.json
+    python main.py tool-call-bench --cities "Tokyo,Paris,London"
+    python main.py load-test --targets weather,simple --rps 50 --duration 10 --latency 0.3
+    python main.py check prompt-cache
+
+Only the chosen scenario's modules are imported, and the kernel and chat
+service are built only by scenarios that use them, so ``--help`` or a run of
+one agent doesn't pay for loading every example.  ``--dry-run`` stops after
+the imports.  ``import-report`` runs a scenario under ``python -X importtime``
+and prints where its startup time goes; ``startup-bench`` times a dry run of
+every scenario against an interpreter that does nothing and one that imports
+everything up front, and exits 1 when ``--help`` is not faster than importing
+everything or a scenario takes longer than ``--max-ms``.  ``tool-call-bench``
+compares, offline, how many tool calls and model round trips the weather
+plugin's single-city and multi-city tools take for one question.
+``load-test`` drives the scenarios' flows at a target request rate against an
+in-process fake Azure OpenAI service (no credentials needed) and reports
+throughput, latency percentiles and event loop lag.  ``check`` runs the
+offline checks in loadtest/checks.py and exits non-zero if one fails.
+"""
+
+import argparse
 import asyncio
-from config.kernal_config import create_kernel
-from functions.setup import add_all_functions
-from function_orchestrator import SemanticOrchestrator
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
-
-from plugin_orchestrator import run_weather_report_plugin
-
-def main():
-    chat_completion = AzureChatCompletion()
-    kernel = create_kernel(chat_completion)
-    functions = add_all_functions(kernel)
-
-    # # Run the functions individually
-    # orchestrator = SemanticOrchestrator(kernel, functions)
-    # text = """
-    # Semantic Kernel is a lightweight, open-source development kit that lets 
-    # you easily build AI agents and integrate the latest AI models into your C#, 
-    # Python, or Java codebase. It serves as an efficient middleware that enables 
-    # rapid delivery of enterprise-grade solutions
-    # """
-    # asyncio.run(orchestrator.run_all(text))
-
-    # Run the weather report plugin
-    # user_message = "What's the weather like in Tokyo and are there any alerts?"
-    # asyncio.run(run_weather_report_plugin(kernel, chat_completion, user_message))
-
-    # asyncio.run(simple_agent_example())
-
-    # asyncio.run(specialized_agent_example())
-    # asyncio.run(multi_turn_agent_example())
-    # asyncio.run(keeping_length_in_check_example())
-    asyncio.run(notes_agent_example())
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+SAMPLE_TEXT = """
+Semantic Kernel is a lightweight, open-source development kit that lets
+you easily build AI agents and integrate the latest AI models into your C#,
+Python, or Java codebase. It serves as an efficient middleware that enables
+rapid delivery of enterprise-grade solutions
+"""
+
+WEATHER_MESSAGE = "What's the weather like in Tokyo and are there any alerts?"
+
+
+def _kernel():
+    from config.kernal_config import create_kernel
+    from config.rate_limiter import scheduler_from_env
+    from config.service_registry import registry
+
+    # LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE put every call through one rate-limited queue;
+    # run_scenario closes it with the registry
+    registry.use_scheduler(scheduler_from_env())
+    # shares its connection pool with any agents created later
+    chat_completion = registry.chat_completion()
+    return create_kernel(chat_completion), chat_completion
+
+
+def _functions(args):
+    from function_orchestrator import SemanticOrchestrator
+    from functions.prompt_cache import PromptResultCache
+    from functions.setup import add_all_functions
+
+    if args.dry_run:
+        return None
+    kernel, _ = _kernel()
+    # only the summary opts in to temperature 0, and with it to answers from the cache
+    prompt_cache = PromptResultCache(functions={"Summarizer-tldr"})
+    functions = add_all_functions(kernel, prompt_cache=prompt_cache, deterministic=("tldr",))
+    orchestrator = SemanticOrchestrator(kernel, functions)
+    return orchestrator.run_all_stream(args.text) if args.stream else orchestrator.run_all(args.text)
+
+
+def _weather(args):
+    from functions.tool_scheduler import ToolCallScheduler
+    from plugin_orchestrator import run_weather_report_plugin, run_weather_report_plugin_stream
+
+    if args.dry_run:
+        return None
+    kernel, chat_completion = _kernel()
+    run = run_weather_report_plugin_stream if args.stream else run_weather_report_plugin
+    return run(kernel, chat_completion, args.message, ToolCallScheduler(timeout=10.0), not args.single_city_tools)
+
+
+def _notes(args):
+    from agents.agent_plugin import notes_agent_example
+
+    if args.dry_run:
+        return None
+    return notes_agent_example(args.metrics_format, args.metrics_out)
+
+
+def _example(module: str, function: str, stream_function: Optional[str] = None, threaded: bool = False):
+    """A scenario that just runs ``module.function()`` (or its streaming twin)."""
+    def run(args):
+        mod = importlib.import_module(module)
+        name = stream_function if args.stream and stream_function else function
+        example = getattr(mod, name)
+        if args.dry_run:
+            return None
+        return example(thread_id=args.thread_id) if threaded else example()
+    return run
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "functions": _functions,
+    "weather": _weather,
+    "simple": _example("agents.simple_agent", "simple_agent_example", "simple_agent_stream_example"),
+    "specialized": _example(
+        "agents.specialized_agent", "specialized_agent_example", "specialized_agent_stream_example"
+    ),
+    "multi-turn": _example("agents.multi_turn_agent", "multi_turn_agent_example", threaded=True),
+    "keeping-length": _example("agents.keeping_length_in_check", "keeping_length_in_check_example", threaded=True),
+    "notes": _notes,
+}
+
+SCENARIO_HELP = {
+    "functions": "summarize and translate a text with the semantic functions",
+    "weather": "answer a weather question with the weather plugin",
+    "simple": "ask a simple agent one question",
+    "specialized": "ask templated python/java agents",
+    "multi-turn": "a multi-turn conversation persisted to threads.db",
+    "keeping-length": "a long conversation kept under a token budget",
+    "notes": "an agent that writes and lists notes",
+}
+
+
+def run_scenario(args) -> int:
+    coro = SCENARIOS[args.command](args)
+    if coro is None:
+        return 0
+    asyncio.run(_closing_registry(coro))
+    return 0
+
+
+async def _closing_registry(coro):
+    from config.service_registry import registry
+
+    try:
+        return await coro
+    finally:
+        await registry.aclose()
+
+
+def import_all() -> None:
+    """Import every scenario's modules, as main.py used to do at startup."""
+    for name in SCENARIOS:
+        SCENARIOS[name](argparse.Namespace(dry_run=True, stream=True, thread_id=None))
+
+
+# -- startup diagnostics -------------------------------------------------------
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Rows of ``-X importtime`` output as dicts (times in ms, depth from indentation)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # header
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": depth,
+        })
+    return rows
+
+
+def import_report(scenario: str, top: int = 20) -> Dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), scenario, "--dry-run"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "dry run failed")
+    rows = parse_importtime(proc.stderr)
+    by_package: Dict[str, float] = {}
+    for row in rows:
+        package = row["module"].split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + row["self_ms"]
+    return {
+        "scenario": scenario,
+        "modules": len(rows),
+        "total_ms": round(sum(r["cumulative_ms"] for r in rows if r["depth"] == 0), 1),
+        "packages": [
+            {"package": p, "self_ms": round(ms, 1)}
+            for p, ms in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        ],
+        "slowest_modules": [
+            {"module": r["module"], "cumulative_ms": r["cumulative_ms"]}
+            for r in sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:top]
+        ],
+    }
+
+
+def _time_command(command: List[str], runs: int) -> Dict:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, check=True, capture_output=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 1), "min_ms": round(min(samples), 1)}
+
+
+def startup_bench(scenarios: List[str], runs: int = 5) -> Dict:
+    main_py = os.path.abspath(__file__)
+    commands = {
+        "python (no imports)": [sys.executable, "-c", "pass"],
+        "main.py --help": [sys.executable, main_py, "--help"],
+        "eager (every scenario imported)": [sys.executable, "-c", "import main; main.import_all()"],
+    }
+    for name in scenarios:
+        commands[name] = [sys.executable, main_py, name, "--dry-run"]
+    return {"runs": runs, "results": {name: _time_command(cmd, runs) for name, cmd in commands.items()}}
+
+
+def startup_failures(report: Dict, scenarios: List[str], max_ms: Optional[float] = None) -> List[str]:
+    """What in a ``startup_bench`` report breaks the budget: ``--help`` must beat importing
+    every scenario, and each scenario's dry run must stay within ``max_ms`` (if given)."""
+    results = report["results"]
+    eager = results["eager (every scenario imported)"]["median_ms"]
+    failures = []
+    if results["main.py --help"]["median_ms"] >= eager:
+        failures.append(f"main.py --help ({results['main.py --help']['median_ms']} ms) is not faster than eager imports ({eager} ms)")
+    if max_ms is not None:
+        failures.extend(
+            f"{name} dry run took {results[name]['median_ms']} ms (budget {max_ms:g} ms)"
+            for name in scenarios if results[name]["median_ms"] > max_ms
+        )
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in SCENARIOS:
+        sp = sub.add_parser(name, help=SCENARIO_HELP[name])
+        sp.add_argument("--stream", action="store_true", help="print the answer as it streams in")
+        sp.add_argument("--dry-run", action="store_true", help="import what the scenario needs, then stop")
+        sp.set_defaults(thread_id=None)
+    sub.choices["functions"].add_argument("--text", default=SAMPLE_TEXT)
+    sub.choices["weather"].add_argument("--message", default=WEATHER_MESSAGE)
+    sub.choices["weather"].add_argument("--single-city-tools", action="store_true",
+                                        help="offer the per-city weather functions instead of get_weather_report")
+    sub.choices["notes"].add_argument("--metrics-format", choices=("json", "prometheus"), default="json",
+                                      help="how to export the plugin call metrics at the end")
+    sub.choices["notes"].add_argument("--metrics-out", help="write the metrics here (default: stdout)")
+    for name in ("multi-turn", "keeping-length"):
+        sub.choices[name].add_argument("--thread-id", help="continue a conversation saved in threads.db")
+
+    ir = sub.add_parser("import-report", help="where a scenario's import time goes (python -X importtime)")
+    ir.add_argument("scenario", choices=list(SCENARIOS))
+    ir.add_argument("--top", type=int, default=20)
+
+    sb = sub.add_parser("startup-bench", help="time a dry run of each scenario")
+    sb.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated scenario names")
+    sb.add_argument("--runs", type=int, default=5)
+    sb.add_argument("--max-ms", type=float, help="fail (exit 1) if a scenario's median dry run takes longer")
+    sb.add_argument("--out", help="write the JSON report here (default: stdout)")
+
+    tb = sub.add_parser("tool-call-bench", help="tool calls per question: single-city vs batch weather tools")
+    tb.add_argument("--cities", default="New York,London,Tokyo,Sydney,Paris", help="comma separated city names")
+
+    ck = sub.add_parser("check", help="offline checks of the prompt cache, tool-call scheduling and weather tools against fakes")
+    ck.add_argument("checks", nargs="*", help="which checks to run (default: all)")
+
+    lt = sub.add_parser("load-test", help="drive the flows against a local fake Azure OpenAI service")
+    lt.add_argument("--targets", default="functions,simple,specialized,weather,embeddings",
+                    help="comma separated: functions, simple, specialized, weather, embeddings")
+    lt.add_argument("--rps", type=float, default=10.0, help="requests started per second, per target")
+    lt.add_argument("--duration", type=float, default=10.0, help="seconds of load per target")
+    lt.add_argument("--stream", action="store_true", help="use the streaming flows and report TTFT")
+    lt.add_argument("--poisson", action="store_true", help="random (Poisson) arrivals instead of evenly spaced")
+    lt.add_argument("--max-in-flight", type=int, default=1000, help="drop requests beyond this many in flight")
+    lt.add_argument("--latency", type=float, default=0.1, help="fake service seconds to first token")
+    lt.add_argument("--token-latency", type=float, default=0.005, help="fake service seconds per further token")
+    lt.add_argument("--capacity", type=int, help="requests the fake service serves at once (default: unlimited)")
+    lt.add_argument("--service-rpm", type=int, help="fake service answers 429 beyond this many requests per minute")
+    lt.add_argument("--rpm", type=float, help="schedule calls through a rate limiter of this many requests per minute")
+    lt.add_argument("--tpm", type=float, help="... and/or this many tokens per minute")
+    lt.add_argument("--out", help="write the JSON report here (default: stdout)")
+
+    argv = sys.argv[1:] if argv is None else argv
+    # a bare ``python main.py`` still runs the notes agent, as it did before the subcommands
+    args = parser.parse_args(argv or ["notes"])
+
+    if args.command == "import-report":
+        print(json.dumps(import_report(args.scenario, args.top), indent=2))
+        return 0
+    status = 0
+    if args.command in ("startup-bench", "load-test"):
+        if args.command == "startup-bench":
+            scenarios = args.scenarios.split(",")
+            result = startup_bench(scenarios, args.runs)
+            result["failures"] = startup_failures(result, scenarios, args.max_ms)
+            status = 1 if result["failures"] else 0
+        else:
+            from loadtest.fake_azure import FakeServiceConfig
+            from loadtest.targets import load_test
+            config = FakeServiceConfig(
+                latency=args.latency, token_latency=args.token_latency, capacity=args.capacity, rpm_limit=args.service_rpm
+            )
+            result = asyncio.run(load_test(
+                args.targets.split(","), args.rps, args.duration, args.stream, config, args.max_in_flight, args.poisson,
+                args.rpm, args.tpm,
+            ))
+        report = json.dumps(result, indent=2)
+        if args.out:
+            with open(args.out, "w") as f:
+                f.write(report + "\n")
+        else:
+            print(report)
+        return status
+    if args.command == "check":
+        from loadtest.checks import CHECKS, run_checks
+        results = run_checks(args.checks or list(CHECKS))
+        print(json.dumps(results, indent=2))
+        return 0 if all(r["ok"] for r in results.values()) else 1
+    if args.command == "tool-call-bench":
+        from loadtest.tool_call_bench import tool_call_bench
+        print(json.dumps(asyncio.run(tool_call_bench(args.cities.split(","))), indent=2))
+        return 0
+
+    if not args.dry_run:
+        from config.env_loader import load_env_vars
+        load_env_vars()
+    return run_scenario(args)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Run blocking tool bodies off the event loop.
+
+FastMCP serves every client from one asyncio loop, so a tool that does
+blocking sqlite I/O directly stalls all other requests.  ``AsyncToolExecutor``
+hands the blocking part to a dedicated, bounded thread pool (sized like the
+connection pool so worker threads never queue on it) and caps how many tool
+calls may be in flight at once.  Per-tool counters show how deep each tool's
+queue gets.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class AsyncToolExecutor:
+    def __init__(self, max_workers: int = 8, max_concurrency: int = 64):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-db")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    def _tool_metrics(self, tool: str) -> Dict[str, float]:
+        m = self._metrics.get(tool)
+        if m is None:
+            m = self._metrics[tool] = {
+                "calls": 0, "errors": 0, "queued": 0, "running": 0,
+                "max_queue_depth": 0, "queue_seconds": 0.0, "run_seconds": 0.0,
+            }
+        return m
+
+    async def run(self, tool: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` in the worker pool on behalf of ``tool``."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        submitted = time.perf_counter()
+        dequeued = []  # set by whichever of worker / cancellation leaves the queue first
+        with self._lock:
+            m = self._tool_metrics(tool)
+            m["calls"] += 1
+            m["queued"] += 1
+            m["max_queue_depth"] = max(m["max_queue_depth"], m["queued"])
+
+        def leave_queue() -> None:
+            if not dequeued:
+                dequeued.append(True)
+                m["queued"] -= 1
+
+        def work() -> T:
+            started = time.perf_counter()
+            with self._lock:
+                leave_queue()
+                m["running"] += 1
+                m["queue_seconds"] += started - submitted
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    m["running"] -= 1
+                    m["run_seconds"] += time.perf_counter() - started
+
+        try:
+            async with self._semaphore:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, work)
+        except BaseException:
+            with self._lock:
+                m["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                leave_queue()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_concurrency": self.max_concurrency,
+                "tools": {name: dict(m) for name, m in self._metrics.items()},
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+def offload(executor: AsyncToolExecutor, tool: Optional[str] = None):
+    """Decorator turning a blocking function into a coroutine run on ``executor``."""
+    def decorator(fn: Callable[..., T]) -> Callable[..., "asyncio.Future[T]"]:
+        name = tool or fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            return await executor.run(name, fn, *args, **kwargs)
+
+        return wrapper
+    return decorator
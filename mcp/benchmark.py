@@ -0,0 +1,360 @@
+"""Benchmarks for the MCP tool layer.
+
+    python benchmark.py tools --customers 10000 --concurrency 1,16 --out bench.json
+    python benchmark.py compare before.json after.json
+    python benchmark.py subscription-queries --db contoso.db
+    python benchmark.py serialization --db contoso.db
+
+``tools`` builds a synthetic ``contoso.db`` at the requested scale (or uses
+``--db``), then drives every tool both directly (awaiting the tool coroutine)
+and through FastMCP's in-process client at each concurrency level.  It
+reports p50/p95/p99 latency, ops/sec and peak RSS as JSON, tagged with the
+current git commit so runs can be compared with ``compare``.
+
+``subscription-queries`` grows a single subscription to an increasing number
+of invoices (in a scratch copy of the database) and checks that
+``fetch_subscription_details`` keeps issuing the same number of SQL
+statements while only the row count grows.
+
+``serialization`` builds the same subscription details through the validated
+``Model(**row)`` path and the ``row_mappers`` fast path, checks that both
+serialise to identical JSON and reports the time each takes.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+
+def count_queries(db: sqlite3.Connection, fn, *args):
+    """Run ``fn(db, *args)`` and return ``(result, statements_executed)``."""
+    statements: List[str] = []
+    db.set_trace_callback(statements.append)
+    try:
+        result = fn(db, *args)
+    finally:
+        db.set_trace_callback(None)
+    return result, len(statements)
+
+
+def _grow_subscription(db: sqlite3.Connection, subscription_id: int, invoices: int) -> None:
+    db.execute("DELETE FROM Payments WHERE invoice_id IN (SELECT invoice_id FROM Invoices WHERE subscription_id = ?)",
+               (subscription_id,))
+    db.execute("DELETE FROM Invoices WHERE subscription_id = ?", (subscription_id,))
+    for n in range(invoices):
+        cur = db.execute(
+            "INSERT INTO Invoices (subscription_id, invoice_date, amount, description, due_date) "
+            "VALUES (?, '2025-01-01', 100.0, ?, '2025-01-31')",
+            (subscription_id, f"Invoice {n}"),
+        )
+        db.executemany(
+            "INSERT INTO Payments (invoice_id, payment_date, amount, method, status) VALUES (?, '2025-01-15', ?, 'card', ?)",
+            [(cur.lastrowid, 40.0, "successful"), (cur.lastrowid, 60.0, "failed")],
+        )
+    db.commit()
+
+
+def bench_subscription_queries(db_path: str, sizes: List[int]) -> List[Dict]:
+    from mcp_server import fetch_subscription_details
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = os.path.join(tmp, "contoso.db")
+        shutil.copyfile(db_path, scratch)
+        db = sqlite3.connect(scratch)
+        db.row_factory = sqlite3.Row
+        subscription_id = db.execute("SELECT MIN(subscription_id) FROM Subscriptions").fetchone()[0]
+        for size in sizes:
+            _grow_subscription(db, subscription_id, size)
+            start = time.perf_counter()
+            (detail,), queries = count_queries(db, fetch_subscription_details, [subscription_id])
+            elapsed = time.perf_counter() - start
+            assert len(detail.invoices) == size
+            results.append({"invoices": size, "queries": queries, "seconds": round(elapsed, 6)})
+        db.close()
+    return results
+
+
+def bench_serialization(db_path: str, sizes: List[int], repeat: int = 5) -> List[Dict]:
+    from mcp_server import fetch_subscription_details
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = os.path.join(tmp, "contoso.db")
+        shutil.copyfile(db_path, scratch)
+        db = sqlite3.connect(scratch)
+        db.row_factory = sqlite3.Row
+        subscription_id = db.execute("SELECT MIN(subscription_id) FROM Subscriptions").fetchone()[0]
+        for size in sizes:
+            _grow_subscription(db, subscription_id, size)
+            timings = {}
+            outputs = {}
+            for validate in (True, False):
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    (detail,) = fetch_subscription_details(db, [subscription_id], validate=validate)
+                    json_text = detail.model_dump_json()
+                    best = min(best, time.perf_counter() - start)
+                timings["validated" if validate else "fast"] = best
+                outputs[validate] = json_text
+            results.append({
+                "invoices": size,
+                "validated_ms": round(timings["validated"] * 1000, 3),
+                "fast_ms": round(timings["fast"] * 1000, 3),
+                "speedup": round(timings["validated"] / timings["fast"], 2),
+                "identical_json": outputs[True] == outputs[False],
+            })
+        db.close()
+    return results
+
+
+##############################################################################
+#                              TOOL BENCHMARK                                #
+##############################################################################
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+_TOOLS = [
+    "get_all_customers",
+    "get_customer_detail",
+    "get_subscription_detail",
+    "get_subscription_details",
+    "get_invoice_payments",
+    "search_knowledge_base",
+]
+
+
+def _workloads(db_path: str, rng: random.Random) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Tool name -> factory for one call's arguments (as the MCP client would send them)."""
+    db = sqlite3.connect(db_path)
+    customers = db.execute("SELECT MAX(customer_id) FROM Customers").fetchone()[0] or 1
+    subscriptions = db.execute("SELECT MAX(subscription_id) FROM Subscriptions").fetchone()[0] or 1
+    invoices = db.execute("SELECT MAX(invoice_id) FROM Invoices").fetchone()[0] or 1
+    db.close()
+    return {
+        "get_all_customers": lambda: {"params": {"page_size": 50, "cursor": rng.randint(0, customers),
+                                                 "loyalty_level": rng.choice([None, "Gold", "Silver", "Bronze"])}},
+        "get_customer_detail": lambda: {"params": {"customer_id": rng.randint(1, customers)}},
+        "get_subscription_detail": lambda: {"params": {"subscription_id": rng.randint(1, subscriptions)}},
+        "get_subscription_details": lambda: {
+            "params": {"subscription_ids": rng.sample(range(1, subscriptions + 1), min(10, subscriptions))}
+        },
+        "get_invoice_payments": lambda: {"params": {"invoice_id": rng.randint(1, invoices)}},
+        "search_knowledge_base": lambda: {"params": {"query": rng.choice(["roaming", "slow internet", "refund"])}},
+    }
+
+
+async def _drive(call: Callable[[Dict[str, Any]], Any], make_args, ops: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    remaining = ops
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            args = make_args()
+            start = time.perf_counter()
+            try:
+                await call(args)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "ops": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "ops_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def bench_tools(
+    db_path: str,
+    tools: List[str],
+    concurrency_levels: List[int],
+    ops: int,
+    modes: List[str],
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    # the server reads its configuration at import time
+    os.environ["CONTOSO_DB_PATH"] = db_path
+    import mcp_server
+    from fastmcp import Client
+
+    rng = random.Random(seed)
+    workloads = _workloads(db_path, rng)
+    results = []
+    async with Client(mcp_server.mcp) as client:
+        for tool in tools:
+            fn = getattr(mcp_server, tool)
+            make_args = workloads[tool]
+
+            async def direct(args, fn=fn):
+                if "params" in args:
+                    params_type = next(iter(fn.__annotations__.values()))
+                    return await fn(params_type(**args["params"]))
+                return await fn(**args)
+
+            async def via_client(args, tool=tool):
+                return await client.call_tool(tool, args)
+
+            calls = {"direct": direct, "client": via_client}
+            for mode in modes:
+                for concurrency in concurrency_levels:
+                    await _drive(calls[mode], make_args, min(ops, 5), 1)  # warm-up
+                    stats = await _drive(calls[mode], make_args, ops, concurrency)
+                    results.append({"tool": tool, "mode": mode, "concurrency": concurrency, **stats})
+                    print(
+                        f"{tool:<26} {mode:<6} c={concurrency:<3} {stats['ops_per_sec']:>9} ops/s  "
+                        f"p50 {stats['p50_ms']:>8}ms  p95 {stats['p95_ms']:>8}ms  p99 {stats['p99_ms']:>8}ms",
+                        file=sys.stderr,
+                    )
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]) -> List[str]:
+    """One line per (tool, mode, concurrency) present in both reports."""
+    old = {(r["tool"], r["mode"], r["concurrency"]): r for r in before["results"]}
+    lines = []
+    for r in after["results"]:
+        o = old.get((r["tool"], r["mode"], r["concurrency"]))
+        if o is None:
+            continue
+        speedup = r["ops_per_sec"] / o["ops_per_sec"] if o["ops_per_sec"] else float("inf")
+        lines.append(
+            f"{r['tool']:<26} {r['mode']:<6} c={r['concurrency']:<3} "
+            f"ops/s {o['ops_per_sec']:>9} -> {r['ops_per_sec']:<9} ({speedup:.2f}x)  "
+            f"p95 {o['p95_ms']}ms -> {r['p95_ms']}ms"
+        )
+    return lines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    tb = sub.add_parser("tools", help="latency/throughput of every tool, direct and via the FastMCP client")
+    tb.add_argument("--db", help="existing database to use instead of generating one")
+    tb.add_argument("--customers", type=int, default=1_000, help="scale of the generated database")
+    tb.add_argument("--invoices", type=int, default=12, help="invoices per subscription in the generated database")
+    tb.add_argument("--tools", default=",".join(_TOOLS))
+    tb.add_argument("--modes", default="direct,client")
+    tb.add_argument("--concurrency", default="1,8,32", help="comma separated concurrency levels")
+    tb.add_argument("--ops", type=int, default=200, help="calls per tool/mode/concurrency")
+    tb.add_argument("--cache", action="store_true", help="keep the response cache on (off by default)")
+    tb.add_argument("--seed", type=int, default=0)
+    tb.add_argument("--out", help="write the JSON report here (default: stdout)")
+
+    cmp = sub.add_parser("compare", help="compare two JSON reports from `tools`")
+    cmp.add_argument("before")
+    cmp.add_argument("after")
+
+    sq = sub.add_parser("subscription-queries", help="query count vs. invoice count for get_subscription_detail")
+    sq.add_argument("--db", default="contoso.db")
+    sq.add_argument("--sizes", default="1,10,100,1000", help="comma separated invoice counts")
+
+    se = sub.add_parser("serialization", help="validated vs. row-mapper construction of subscription details")
+    se.add_argument("--db", default="contoso.db")
+    se.add_argument("--sizes", default="10,100,1000", help="comma separated invoice counts")
+
+    args = parser.parse_args(argv)
+    if args.command == "tools":
+        if not args.cache:
+            os.environ["MCP_RESULT_CACHE_TTL"] = "0"
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = args.db
+            if db_path is None:
+                from schema import generate_synthetic_db
+
+                db_path = os.path.join(tmp, "contoso.db")
+                generate_synthetic_db(
+                    db_path, customers=args.customers, invoices_per_subscription=args.invoices, seed=args.seed
+                )
+            results = asyncio.run(bench_tools(
+                os.path.abspath(db_path),
+                tools=args.tools.split(","),
+                concurrency_levels=[int(c) for c in args.concurrency.split(",")],
+                ops=args.ops,
+                modes=args.modes.split(","),
+                seed=args.seed,
+            ))
+        report = {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "config": {k: v for k, v in vars(args).items() if k not in ("command", "out")},
+            "results": results,
+        }
+        text = json.dumps(report, indent=2)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                f.write(text)
+        else:
+            print(text)
+    elif args.command == "compare":
+        with open(args.before, encoding="utf-8") as f:
+            before = json.load(f)
+        with open(args.after, encoding="utf-8") as f:
+            after = json.load(f)
+        print(f"{before.get('commit')} -> {after.get('commit')}")
+        print("\n".join(compare(before, after)))
+    elif args.command == "serialization":
+        results = bench_serialization(args.db, [int(s) for s in args.sizes.split(",")])
+        print(json.dumps(results, indent=2))
+        if not all(r["identical_json"] for r in results):
+            print("fast path output differs from the validated path", file=sys.stderr)
+            return 1
+    elif args.command == "subscription-queries":
+        results = bench_subscription_queries(args.db, [int(s) for s in args.sizes.split(",")])
+        print(json.dumps(results, indent=2))
+        if len({r["queries"] for r in results}) != 1:
+            print("query count grows with invoice count", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Bounded, thread-safe SQLite connection pool used by the MCP tools.
+
+Connections are opened lazily up to ``size`` and handed out from a LIFO
+queue, so the most recently used (and therefore warmest) connection is
+reused first.  Each connection keeps its own prepared-statement cache
+(``cached_statements``), which is what makes re-running the same tool
+queries cheap.  When a broken connection is discarded, its slot goes back
+into the same queue as a ``None`` marker, so a thread already waiting for a
+connection wakes up and opens a replacement instead of timing out.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+
+class PoolTimeout(TimeoutError):
+    """Raised when no connection became available within the pool timeout."""
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 8,
+        timeout: float = 5.0,
+        readonly: bool = False,
+        wal: bool = True,
+        cached_statements: int = 256,
+    ):
+        if size < 1:
+            raise ValueError("pool size must be >= 1")
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.readonly = readonly
+        self.wal = wal
+        self.cached_statements = cached_statements
+
+        # idle connections, and None for a free slot (counted in _open) whose taker opens a new one
+        self._idle: "queue.LifoQueue[Optional[sqlite3.Connection]]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._closed = False
+        self._wal_checked = False
+        self._stats = {"hits": 0, "opened": 0, "waits": 0, "timeouts": 0, "wait_seconds": 0.0}
+
+    # ------------------------------------------------------------------ #
+    def _connect(self) -> sqlite3.Connection:
+        if not self._wal_checked:
+            self._ensure_wal()
+        if self.readonly:
+            uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(
+                uri,
+                uri=True,
+                check_same_thread=False,
+                cached_statements=self.cached_statements,
+            )
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=self.cached_statements,
+            )
+            conn.execute("PRAGMA busy_timeout = %d" % int(self.timeout * 1000))
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _ensure_wal(self) -> None:
+        # journal_mode is persistent, so it only has to be switched once per
+        # database file; read-only connections are not allowed to change it.
+        self._wal_checked = True
+        if not self.wal:
+            return
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+            try:
+                conn.execute("PRAGMA journal_mode = WAL")
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            # e.g. database on a read-only volume: fall back to the existing mode
+            pass
+
+    def _open_slot(self) -> sqlite3.Connection:
+        """Connect for a slot already counted in ``_open``; gives the slot up if that fails."""
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+            raise
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._stats["hits" if conn is not None else "opened"] += 1
+            return conn if conn is not None else self._open_slot()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("connection pool is closed")
+            can_open = self._open < self.size
+            if can_open:
+                self._open += 1
+                self._stats["opened"] += 1
+            else:
+                self._stats["waits"] += 1
+        if can_open:
+            return self._open_slot()
+
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise PoolTimeout(
+                f"no database connection available after {self.timeout}s (pool size {self.size})"
+            )
+        with self._lock:
+            self._stats["wait_seconds"] += time.perf_counter() - start
+            if conn is None:
+                self._stats["opened"] += 1
+        return conn if conn is not None else self._open_slot()
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # a connection that cannot roll back should not go back into the pool
+            self._discard(conn)
+            return
+        if self._closed:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                if self._closed:
+                    self._open -= 1
+                else:
+                    # hand the slot to whoever is blocked in _acquire (or the next caller);
+                    # under the lock, so close() either sees the marker or we see _closed
+                    self._idle.put(None)
+
+    # ------------------------------------------------------------------ #
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of the ``with`` block."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                **self._stats,
+                "size": self.size,
+                "open_connections": self._open,
+                "idle_connections": self._idle.qsize(),
+                "in_use": self._open - self._idle.qsize(),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if conn is None:
+                with self._lock:
+                    self._open -= 1
+            else:
+                self._discard(conn)
@@ -0,0 +1,167 @@
+"""Content-addressed embedding cache and request batching for ``get_embedding``.
+
+``EmbeddingCache`` keeps recently used vectors in an in-memory LRU in front of
+an optional SQLite file, keyed by ``sha256(model + text)``, so the same text is
+only ever embedded once per model.  Vectors are held as float32 arrays (as on
+disk), about 6 KB for 1536 dimensions instead of ~50 KB as a list of floats,
+and turned back into lists only when returned.
+
+``EmbeddingBatcher`` sits in front of any OpenAI-style client (anything with
+``client.embeddings.create(input=[...], model=...)``).  Concurrent single-text
+calls are queued and flushed together as one multi-input request once
+``max_batch`` texts are waiting or ``max_wait`` seconds have passed.  A
+failed request (or anything else going wrong in a flush) is raised to every
+caller in that batch; the worker thread carries on with the next one.
+"""
+
+import hashlib
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class EmbeddingCache:
+    def __init__(self, path: Optional[str] = None, max_items: int = 10_000, namespace: str = ""):
+        self.max_items = max_items
+        self.namespace = namespace or ""
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._db.commit()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        keys = [self.key(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for k in keys:
+                if k in self._memory:
+                    self._memory.move_to_end(k)
+                    found[k] = self._memory[k]
+                    self.stats["memory_hits"] += 1
+            cold = [k for k in dict.fromkeys(keys) if k not in found]
+            if cold and self._db is not None:
+                marks = ",".join("?" * len(cold))
+                for k, blob in self._db.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", cold):
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(k, vector)
+                    found[k] = vector
+                    self.stats["disk_hits"] += 1
+            self.stats["misses"] += sum(1 for k in keys if k not in found)
+        return [found[k].tolist() if k in found else None for k in keys]
+
+    def get(self, text: str) -> Optional[List[float]]:
+        return self.get_many([text])[0]
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                k = self.key(text)
+                array = np.array(vector, dtype=np.float32)
+                self._remember(k, array)
+                rows.append((k, array.tobytes()))
+            if self._db is not None and rows:
+                self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+                self._db.commit()
+
+    def put(self, text: str, vector: Sequence[float]) -> None:
+        self.put_many([text], [vector])
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        client,
+        model: str,
+        cache: Optional[EmbeddingCache] = None,
+        max_batch: int = 64,
+        max_wait: float = 0.01,
+    ):
+        self.client = client
+        self.model = model
+        self.cache = cache
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.stats = {"requests": 0, "texts_sent": 0}
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._pending.get()]
+            try:
+                while len(batch) < self.max_batch:
+                    batch.append(self._pending.get(timeout=self.max_wait))
+            except queue.Empty:
+                pass
+            try:
+                self._flush(batch)
+            except Exception as exc:
+                self._fail(batch, exc)
+
+    @staticmethod
+    def _fail(batch: List[tuple], exc: BaseException) -> None:
+        for _, fut in batch:
+            if not fut.done():
+                fut.set_exception(exc)
+
+    def _flush(self, batch: List[tuple]) -> None:
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        by_text = dict(zip(texts, self._request(texts)))
+        for text, fut in batch:
+            fut.set_result(by_text[text])
+
+    def _request(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.embeddings.create(input=texts, model=self.model)
+        self.stats["requests"] += 1
+        self.stats["texts_sent"] += len(texts)
+        vectors = [None] * len(texts)
+        for i, item in enumerate(response.data):
+            vectors[getattr(item, "index", i)] = item.embedding
+        if any(v is None for v in vectors):
+            raise RuntimeError(f"embeddings response has {len(response.data)} vectors for {len(texts)} inputs")
+        if self.cache is not None:
+            self.cache.put_many(texts, vectors)
+        return vectors
+
+    def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed several texts, serving what it can from the cache."""
+        cached = self.cache.get_many(texts) if self.cache is not None else [None] * len(texts)
+        futures: Dict[str, Future] = {}
+        for text, vector in zip(texts, cached):
+            if vector is None and text not in futures:
+                futures[text] = Future()
+                self._pending.put((text, futures[text]))
+        if futures:
+            self._ensure_worker()
+        return [vector if vector is not None else futures[text].result() for text, vector in zip(texts, cached)]
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_many([text])[0]
@@ -0,0 +1,155 @@
+"""In-memory vector index for the knowledge-base search tool.
+
+Embeddings are L2-normalised once when they are added, so a query is a single
+matrix-vector product followed by ``argpartition`` for the top-k rows; no
+per-document Python work happens at search time.  An index can be saved to
+``<path>.npy`` / ``<path>.json`` and loaded back memory-mapped, which keeps
+start-up cheap for large knowledge bases.
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+Hit = Tuple[Dict[str, Any], float]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0  # all-zero embeddings stay zero and score 0
+    return vectors / norms
+
+
+class KBIndex:
+    def __init__(self, dim: int, dtype=np.float32, capacity: int = 1024):
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self._matrix = np.zeros((capacity, dim), dtype=self.dtype)
+        self._ids: List[Any] = []
+        self._docs: List[Dict[str, Any]] = []
+        self._positions: Dict[Any, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # ------------------------------------------------------------------ #
+    # construction / persistence
+    # ------------------------------------------------------------------ #
+    @classmethod
+    def from_db(cls, db: sqlite3.Connection) -> "KBIndex":
+        """Build an index from the ``KnowledgeDocuments`` table (embeddings stored as JSON)."""
+        rows = db.execute(
+            "SELECT document_id, title, doc_type, content, topic_embedding FROM KnowledgeDocuments"
+        ).fetchall()
+        embeddings = [json.loads(r[4]) for r in rows if r[4]]
+        dim = len(embeddings[0]) if embeddings else 1536
+        index = cls(dim, capacity=max(len(rows), 1))
+        index.add_many(
+            [r[0] for r in rows if r[4]],
+            [{"title": r[1], "doc_type": r[2], "content": r[3]} for r in rows if r[4]],
+            embeddings,
+        )
+        return index
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            np.save(path + ".npy", self._matrix[: len(self._ids)])
+            with open(path + ".json", "w", encoding="utf-8") as f:
+                json.dump({"ids": self._ids, "docs": self._docs}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "KBIndex":
+        """Load a saved index; with ``mmap`` the matrix is paged in from disk on demand."""
+        matrix = np.load(path + ".npy", mmap_mode="r" if mmap else None)
+        with open(path + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(matrix.shape[1], dtype=matrix.dtype, capacity=0)
+        index._matrix = matrix
+        index._ids = list(meta["ids"])
+        index._docs = list(meta["docs"])
+        index._positions = {doc_id: i for i, doc_id in enumerate(index._ids)}
+        return index
+
+    # ------------------------------------------------------------------ #
+    # incremental updates
+    # ------------------------------------------------------------------ #
+    def _writable(self, rows_needed: int) -> None:
+        # grow geometrically; this also copies a read-only memory map into RAM
+        matrix = self._matrix
+        if matrix.flags.writeable and matrix.shape[0] >= rows_needed:
+            return
+        capacity = max(rows_needed, 2 * matrix.shape[0], 16)
+        grown = np.zeros((capacity, self.dim), dtype=self.dtype)
+        grown[: len(self._ids)] = matrix[: len(self._ids)]
+        self._matrix = grown
+
+    def add_many(self, doc_ids: Sequence[Any], docs: Sequence[Dict[str, Any]], embeddings: Iterable[Sequence[float]]) -> None:
+        """Insert or replace documents."""
+        vectors = _normalize(np.asarray(list(embeddings), dtype=self.dtype).reshape(len(doc_ids), self.dim))
+        with self._lock:
+            self._writable(len(self._ids) + len(doc_ids))
+            for doc_id, doc, vec in zip(doc_ids, docs, vectors):
+                pos = self._positions.get(doc_id)
+                if pos is None:
+                    pos = len(self._ids)
+                    self._positions[doc_id] = pos
+                    self._ids.append(doc_id)
+                    self._docs.append(doc)
+                else:
+                    self._docs[pos] = doc
+                self._matrix[pos] = vec
+
+    def add(self, doc_id: Any, doc: Dict[str, Any], embedding: Sequence[float]) -> None:
+        self.add_many([doc_id], [doc], [embedding])
+
+    def remove(self, doc_id: Any) -> bool:
+        """Remove a document in O(1) by moving the last row into its slot."""
+        with self._lock:
+            pos = self._positions.pop(doc_id, None)
+            if pos is None:
+                return False
+            self._writable(len(self._ids))
+            last = len(self._ids) - 1
+            if pos != last:
+                self._matrix[pos] = self._matrix[last]
+                self._ids[pos] = self._ids[last]
+                self._docs[pos] = self._docs[last]
+                self._positions[self._ids[pos]] = pos
+            self._ids.pop()
+            self._docs.pop()
+            return True
+
+    # ------------------------------------------------------------------ #
+    # search
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        if k < scores.shape[-1]:
+            part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+        else:
+            part = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape)
+        order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1, kind="stable")
+        return np.take_along_axis(part, order, axis=-1)
+
+    def search_batch(self, queries: Sequence[Sequence[float]], topk: int = 3) -> List[List[Hit]]:
+        """Return the ``topk`` (doc, cosine score) pairs for every query vector."""
+        q = _normalize(np.asarray(queries, dtype=self.dtype).reshape(-1, self.dim))
+        with self._lock:
+            n = len(self._ids)
+            k = min(topk, n)
+            if k <= 0:
+                return [[] for _ in range(q.shape[0])]
+            scores = q @ self._matrix[:n].T
+            top = self._top_k(scores, k)
+            return [
+                [(self._docs[i], float(row_scores[i])) for i in row_top]
+                for row_top, row_scores in zip(top, scores)
+            ]
+
+    def search(self, query: Sequence[float], topk: int = 3) -> List[Hit]:
+        return self.search_batch([query], topk)[0]
+
@@ -1,14 +1,41 @@
 # This file has been originally authored by https://github.com/microsoft/OpenAIWorkshop/tree/main/agentic_ai/backend_services
 
 from fastmcp import FastMCP  
-from typing import List, Optional, Dict, Any  
+from typing import List, Optional, Dict, Any, ContextManager, Iterator
 from pydantic import BaseModel, Field  
-import sqlite3, os, json, math, asyncio, logging  
+import sqlite3, os, json, asyncio, logging, threading
+from contextlib import asynccontextmanager
 from datetime import datetime  
 from dotenv import load_dotenv  
 
+from async_db import AsyncToolExecutor, offload
+from db_pool import ConnectionPool
+from embedding_cache import EmbeddingBatcher, EmbeddingCache
+from kb_index import KBIndex
+from result_cache import ResultCache, cached
+from row_mappers import map_rows, mapper_for
+from schema import migrate
+from queries import (
+    CUSTOMER_SQL,
+    CUSTOMER_SUBSCRIPTIONS_SQL,
+    CUSTOMERS_PAGE_SQL,
+    INCIDENTS_SQL,
+    INVOICE_PAYMENTS_SQL,
+    INVOICES_SQL,
+    PAYMENTS_SQL,
+    SUBSCRIPTION_OWNER_SQL,
+    SUBSCRIPTIONS_SQL,
+)
+
 load_dotenv()
 
+
+@asynccontextmanager
+async def _lifespan(server):
+    ensure_schema()
+    yield
+
+
 mcp = FastMCP(
     name="Contoso Customer API as Tools",  
     instructions=(
@@ -16,16 +43,48 @@ mcp = FastMCP(
         "tools below.  Return values follow the pydantic schemas Always call the most "  
         "specific tool that answers the user’s question."  
     ),  
+    lifespan=_lifespan,
 )
 
-DB_PATH = "contoso.db"
-  
-def get_db() -> sqlite3.Connection:
-    db = sqlite3.connect(DB_PATH)  
-    db.row_factory = sqlite3.Row
-    return db
+DB_PATH = os.getenv("CONTOSO_DB_PATH", "contoso.db")
+DB_POOL_SIZE = int(os.getenv("MCP_DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("MCP_DB_POOL_TIMEOUT", "5"))
+
+# read tools share a pool of read-only connections; writes go through a
+# single-connection pool so SQLite never sees competing writers.
+_read_pool = ConnectionPool(DB_PATH, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, readonly=True)
+_write_pool = ConnectionPool(DB_PATH, size=1, timeout=DB_POOL_TIMEOUT)
+
+# blocking tool bodies run here, never on FastMCP's event loop
+_tool_executor = AsyncToolExecutor(
+    max_workers=int(os.getenv("MCP_DB_WORKERS", str(DB_POOL_SIZE))),
+    max_concurrency=int(os.getenv("MCP_TOOL_CONCURRENCY", "64")),
+)
+
+# identical tool calls within the TTL are answered from memory; writes invalidate
+_result_cache = ResultCache(
+    max_items=int(os.getenv("MCP_RESULT_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("MCP_RESULT_CACHE_TTL", "60")),
+)
+
+def get_db(readonly: bool = True) -> ContextManager[sqlite3.Connection]:
+    """Borrow a pooled connection: ``with get_db() as db: ...``"""
+    return (_read_pool if readonly else _write_pool).connection()
+
+
+def ensure_schema() -> None:
+    """Apply pending schema migrations (indexes for the tool queries) when the DB is writable."""
+    if not os.path.exists(DB_PATH):
+        return
+    try:
+        with get_db(readonly=False) as db:
+            migrate(db)
+    except sqlite3.Error as exc:  # read-only database: serve with whatever indexes it has
+        logging.getLogger(__name__).warning("could not migrate %s: %s", DB_PATH, exc)
   
 # — safe OpenAI import / dummy embedding  
+EMBEDDING_CACHE_PATH = os.getenv("MCP_EMBEDDING_CACHE_PATH", "embedding_cache.db")
+
 try:  
     from openai import AzureOpenAI  
   
@@ -34,23 +93,44 @@ try:
         api_key=os.getenv("AZURE_OPENAI_API_KEY"),  
         api_version=os.getenv("AZURE_OPENAI_API_VERSION"),  
     )  
-    _emb_model = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME")
-  
-    def get_embedding(text: str) -> List[float]:
-        text = text.replace("\n", " ")
-        return _client.embeddings.create(input=[text], model=_emb_model).data[0].embedding
-  
 except Exception:  # pragma: no cover  
+    _client = None
+
+if _client is None:
     def get_embedding(text: str) -> List[float]:  
         # 1536‑d zero vector falls back when creds are missing (tests/dev mode)  
         return [0.0] * 1536
-  
+else:
+    _emb_model = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME")
+    # repeated texts are served from the cache; concurrent misses share one request.
+    # Built outside the try above: a cache that can't open its file is an error, not "no credentials".
+    _embedder = EmbeddingBatcher(
+        _client,
+        _emb_model,
+        cache=EmbeddingCache(EMBEDDING_CACHE_PATH, namespace=_emb_model),
+        max_batch=int(os.getenv("MCP_EMBEDDING_MAX_BATCH", "64")),
+    )
+
+    def get_embedding(text: str) -> List[float]:
+        return _embedder.embed(text.replace("\n", " "))
+
+
+# — knowledge-base vector index, built once per process
+KB_INDEX_PATH = os.getenv("MCP_KB_INDEX_PATH")  # saved KBIndex (<path>.npy/.json), memory-mapped
+_kb_index: Optional[KBIndex] = None
+_kb_lock = threading.Lock()
 
-def cosine_similarity(vec1, vec2):
-    dot = sum(a * b for a, b in zip(vec1, vec2))
-    norm1 = math.sqrt(sum(a * a for a in vec1))
-    norm2 = math.sqrt(sum(b * b for b in vec2))
-    return dot / (norm1 * norm2) if norm1 and norm2 else 0.0
+def get_kb_index() -> KBIndex:
+    global _kb_index
+    if _kb_index is None:
+        with _kb_lock:
+            if _kb_index is None:
+                if KB_INDEX_PATH and os.path.exists(KB_INDEX_PATH + ".npy"):
+                    _kb_index = KBIndex.load(KB_INDEX_PATH)
+                else:
+                    with get_db() as db:
+                        _kb_index = KBIndex.from_db(db)
+    return _kb_index
 
 ##############################################################################  
 #                              Pydantic MODELS                               #  
@@ -129,7 +209,7 @@ class Promotion(BaseModel):
 
 class KBSearchParams(BaseModel):  
     query: str = Field(..., description="natural language query")  
-    topk: Optional[int] = Field(3, description="Number of top documents to return")  
+    topk: int = Field(3, ge=1, description="Number of top documents to return")  
   
   
 class KBDoc(BaseModel):  
@@ -197,94 +277,226 @@ class InvoiceIdParam(BaseModel):
     invoice_id: int  
 
 
-@mcp.tool(description="List all customers with basic info")  
-def get_all_customers() -> List[CustomerSummary]:  
-    db = get_db()  
-    rows = db.execute(  
-        "SELECT customer_id, first_name, last_name, email, loyalty_level FROM Customers"  
-    ).fetchall()  
-    db.close()  
-    return [CustomerSummary(**dict(r)) for r in rows]  
+class SubscriptionIdsParam(BaseModel):
+    subscription_ids: List[int] = Field(..., description="Subscription ids to fetch in one call")
+
+
+MAX_CUSTOMER_PAGE_SIZE = 500
+
+
+class CustomerListParams(BaseModel):
+    cursor: Optional[int] = Field(None, description="next_cursor from the previous page; omit for the first page")
+    page_size: int = Field(50, ge=1, le=MAX_CUSTOMER_PAGE_SIZE, description="Customers per page")
+    loyalty_level: Optional[str] = Field(None, description="Only customers with this loyalty level (Gold, Silver, Bronze)")
+
+
+class CustomerPage(BaseModel):
+    customers: List[CustomerSummary]
+    next_cursor: Optional[int] = Field(None, description="Pass as cursor to get the next page; null on the last page")
+
+
+##############################################################################
+#                              QUERY HELPERS                                 #
+##############################################################################
+def iter_customers(
+    db: sqlite3.Connection,
+    loyalty_level: Optional[str] = None,
+    after: Optional[int] = None,
+    limit: Optional[int] = None,
+    batch_size: int = 500,
+) -> Iterator[CustomerSummary]:
+    """Yield customers in ``customer_id`` order, reading the cursor ``batch_size`` rows at a time.
+
+    Paging is keyset based (``customer_id > after``), so every page costs the
+    same however deep into the table it is; the filter runs in SQL.
+    """
+    sql = CUSTOMERS_PAGE_SQL
+    args: List[Any] = [after if after is not None else -1]
+    if loyalty_level is not None:
+        sql += " AND loyalty_level = ?"
+        args.append(loyalty_level)
+    sql += " ORDER BY customer_id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        args.append(limit)
+    cur = db.execute(sql, args)
+    to_customer = mapper_for(CustomerSummary, cur.description)
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        for r in rows:
+            yield to_customer(r)
+
+
+def stream_customers(loyalty_level: Optional[str] = None, batch_size: int = 500) -> Iterator[CustomerSummary]:
+    """Iterate over every customer while holding one pooled connection, without materialising the table.
+
+    For internal callers (exports, index builds); tools return bounded pages instead.
+    """
+    with get_db() as db:
+        yield from iter_customers(db, loyalty_level=loyalty_level, batch_size=batch_size)
+
+
+def fetch_subscription_details(
+    db: sqlite3.Connection, subscription_ids: List[int], validate: bool = False
+) -> List[SubscriptionDetail]:
+    """Load several subscriptions with invoices, payments and incidents in a fixed number of queries.
+
+    Results follow the order of ``subscription_ids``; unknown ids raise ``ValueError``.
+    Models are built without validation unless ``validate`` is set (see row_mappers).
+    """
+    ids = list(dict.fromkeys(subscription_ids))
+    ids_json = json.dumps(ids)
+
+    cur = db.execute(SUBSCRIPTIONS_SQL, (ids_json,))
+    to_subscription = mapper_for(
+        SubscriptionDetail, cur.description, extra_fields=("invoices", "service_incidents"), validate=validate
+    )
+    subs = {r["subscription_id"]: r for r in cur}
+    missing = [i for i in ids if i not in subs]
+    if missing:
+        raise ValueError(f"Subscription not found: {', '.join(map(str, missing))}")
+
+    payments: Dict[int, List[Payment]] = {}
+    cur = db.execute(PAYMENTS_SQL, (ids_json,))
+    to_payment = mapper_for(Payment, cur.description, validate=validate)
+    for r in cur:
+        payments.setdefault(r["invoice_id"], []).append(to_payment(r))
+
+    invoices: Dict[int, List[Invoice]] = {}
+    cur = db.execute(INVOICES_SQL, (ids_json,))
+    to_invoice = mapper_for(Invoice, cur.description, extra_fields=("payments",), validate=validate)
+    for r in cur:
+        invoices.setdefault(r["subscription_id"], []).append(
+            to_invoice(r, payments=payments.get(r["invoice_id"], []))
+        )
+
+    incidents: Dict[int, List[ServiceIncident]] = {}
+    cur = db.execute(INCIDENTS_SQL, (ids_json,))
+    to_incident = mapper_for(ServiceIncident, cur.description, validate=validate)
+    for r in cur:
+        incidents.setdefault(r["subscription_id"], []).append(to_incident(r))
+
+    return [
+        to_subscription(subs[i], invoices=invoices.get(i, []), service_incidents=incidents.get(i, []))
+        for i in ids
+    ]
+
+
+def customer_page(
+    after: Optional[int], page_size: int, loyalty_level: Optional[str] = None
+) -> CustomerPage:
+    """One keyset page of customers after ``after`` and the cursor for the next one."""
+    with get_db() as db:
+        customers = list(iter_customers(db, loyalty_level, after=after, limit=page_size + 1))
+    next_cursor = None
+    if len(customers) > page_size:
+        customers = customers[:page_size]
+        next_cursor = customers[-1].customer_id
+    return CustomerPage(customers=customers, next_cursor=next_cursor)
+
+
+@mcp.tool(description=(
+    "List customers with basic info, one page at a time, optionally filtered by loyalty level; "
+    "pass next_cursor back as cursor for the next page"
+))
+@cached(_result_cache, tags=lambda params: [("customers",)])
+@offload(_tool_executor)
+def get_all_customers(params: CustomerListParams) -> CustomerPage:
+    return customer_page(params.cursor, params.page_size, params.loyalty_level)
   
   
 @mcp.tool(description="Get a full customer profile including their subscriptions")  
+@cached(_result_cache, tags=lambda params: [("customer", params.customer_id)])
+@offload(_tool_executor)
 def get_customer_detail(params: CustomerIdParam) -> CustomerDetail:  
-    db = get_db()  
-    cust = db.execute(  
-        "SELECT * FROM Customers WHERE customer_id = ?", (params.customer_id,)  
-    ).fetchone()  
-    if not cust:  
-        db.close()  
-        raise ValueError(f"Customer {params.customer_id} not found")  
-    subs = db.execute(  
-        "SELECT * FROM Subscriptions WHERE customer_id = ?", (params.customer_id,)  
-    ).fetchall()  
-    db.close()  
-    return CustomerDetail(**dict(cust), subscriptions=[dict(s) for s in subs])  
+    with get_db() as db:
+        cur = db.execute(CUSTOMER_SQL, (params.customer_id,))
+        cust = cur.fetchone()
+        if not cust:  
+            raise ValueError(f"Customer {params.customer_id} not found")  
+        subs = db.execute(CUSTOMER_SUBSCRIPTIONS_SQL, (params.customer_id,)).fetchall()
+    to_customer = mapper_for(CustomerDetail, cur.description, extra_fields=("subscriptions",))
+    return to_customer(cust, subscriptions=[dict(s) for s in subs])
 
 @mcp.tool(  
     description=(  
         "Detailed subscription view → invoices (with payments) + service incidents."  
     )  
 )  
+@cached(_result_cache, tags=lambda params: [("subscription", params.subscription_id)])
+@offload(_tool_executor)
 def get_subscription_detail(params: SubscriptionIdParam) -> SubscriptionDetail:  
-    db = get_db()  
-    sub = db.execute(  
-        """  
-        SELECT s.*, p.name AS product_name, p.description AS product_description,  
-               p.category, p.monthly_fee  
-        FROM Subscriptions s  
-        JOIN Products p ON p.product_id = s.product_id  
-        WHERE s.subscription_id = ?  
-        """,  
-        (params.subscription_id,),  
-    ).fetchone()  
-    if not sub:  
-        db.close()  
-        raise ValueError("Subscription not found")  
-  
-    # invoices + nested payments  
-    invoices_rows = db.execute(  
-        """  
-        SELECT invoice_id, invoice_date, amount, description, due_date  
-        FROM Invoices WHERE subscription_id = ?""",  
-        (params.subscription_id,),  
-    ).fetchall()  
-  
-    invoices: List[Invoice] = []  
-    for inv in invoices_rows:  
-        pay_rows = db.execute(  
-            "SELECT * FROM Payments WHERE invoice_id = ?", (inv["invoice_id"],)  
-        ).fetchall()  
-        total_paid = sum(p["amount"] for p in pay_rows if p["status"] == "successful")  
-        invoices.append(  
-            Invoice(  
-                **dict(inv),  
-                payments=[Payment(**dict(p)) for p in pay_rows],  
-                outstanding=max(inv["amount"] - total_paid, 0.0),  
-            )  
-        )  
-  
-    # service incidents  
-    inc_rows = db.execute(  
-        """  
-        SELECT incident_id, incident_date, description, resolution_status  
-        FROM ServiceIncidents  
-        WHERE subscription_id = ?""",  
-        (params.subscription_id,),  
-    ).fetchall()  
-  
-    db.close()  
-    return SubscriptionDetail(  
-        **dict(sub),  
-        invoices=invoices,  
-        service_incidents=[ServiceIncident(**dict(r)) for r in inc_rows],  
-    )  
+    with get_db() as db:
+        return fetch_subscription_details(db, [params.subscription_id])[0]
+
+
+@mcp.tool(description="Detailed view for several subscriptions at once (same shape as get_subscription_detail)")
+@cached(_result_cache, tags=lambda params: [("subscription", i) for i in params.subscription_ids])
+@offload(_tool_executor)
+def get_subscription_details(params: SubscriptionIdsParam) -> List[SubscriptionDetail]:
+    with get_db() as db:
+        return fetch_subscription_details(db, params.subscription_ids)
   
   
 @mcp.tool(description="Return invoice‑level payments list")  
+@offload(_tool_executor)
 def get_invoice_payments(params: InvoiceIdParam) -> List[Payment]:  
-    db = get_db()  
-    rows = db.execute("SELECT * FROM Payments WHERE invoice_id = ?", (params.invoice_id,)).fetchall()  
-    db.close()  
-    return [Payment(**dict(r)) for r in rows]  
\ No newline at end of file
+    with get_db() as db:
+        return map_rows(Payment, db.execute(INVOICE_PAYMENTS_SQL, (params.invoice_id,)))
+
+
+def invalidate_subscription(subscription_id: int, customer_id: Optional[int] = None) -> None:
+    """Drop cached responses that embed this subscription (call after committing a write)."""
+    tags = [("subscription", subscription_id)]
+    if customer_id is not None:
+        tags.append(("customer", customer_id))  # CustomerDetail lists the subscriptions
+    _result_cache.invalidate(*tags)
+
+
+@offload(_tool_executor, tool="update_subscription")
+def _update_subscription(subscription_id: int, update: SubscriptionUpdateRequest) -> int:
+    fields = update.model_dump(exclude_none=True)
+    if not fields:
+        raise ValueError("No fields supplied to update")
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    with get_db(readonly=False) as db:
+        row = db.execute(SUBSCRIPTION_OWNER_SQL, (subscription_id,)).fetchone()
+        if not row:
+            raise ValueError("Subscription not found")
+        db.execute(
+            f"UPDATE Subscriptions SET {assignments} WHERE subscription_id = ?",
+            (*fields.values(), subscription_id),
+        )
+        db.commit()
+    invalidate_subscription(subscription_id, row["customer_id"])
+    return row["customer_id"]
+
+
+@mcp.tool(description="Update one or more fields of a subscription and return the refreshed detail")
+async def update_subscription(subscription_id: int, update: SubscriptionUpdateRequest) -> SubscriptionDetail:
+    await _update_subscription(subscription_id, update)
+    return await get_subscription_detail(SubscriptionIdParam(subscription_id=subscription_id))
+
+
+@mcp.tool(description="Semantic search over the knowledge base (policies, procedures, troubleshooting guides)")
+@offload(_tool_executor)
+def search_knowledge_base(params: KBSearchParams) -> List[KBDoc]:
+    hits = get_kb_index().search(get_embedding(params.query), params.topk)
+    return [KBDoc(**doc) for doc, _ in hits]
+
+
+@mcp.resource("metrics://db-pool", description="Connection pool statistics (hits, waits, open connections)")
+def get_db_pool_stats() -> Dict[str, Any]:
+    return {"read": _read_pool.stats(), "write": _write_pool.stats()}
+
+
+@mcp.resource("metrics://result-cache", description="Tool response cache hits, misses and evictions")
+def get_result_cache_stats() -> Dict[str, Any]:
+    return _result_cache.snapshot()
+
+
+@mcp.resource("metrics://tools", description="Per-tool queue depth, concurrency and timing")
+def get_tool_metrics() -> Dict[str, Any]:
+    return _tool_executor.metrics()
@@ -0,0 +1,66 @@
+"""SQL used by the MCP tools.
+
+Kept apart from ``mcp_server`` so tooling (``schema.py check-plans``,
+benchmarks) can inspect the statements without starting the server.
+"""
+
+CUSTOMER_SQL = "SELECT * FROM Customers WHERE customer_id = ?"
+CUSTOMER_SUBSCRIPTIONS_SQL = "SELECT * FROM Subscriptions WHERE customer_id = ?"
+INVOICE_PAYMENTS_SQL = "SELECT * FROM Payments WHERE invoice_id = ?"
+SUBSCRIPTION_OWNER_SQL = "SELECT customer_id FROM Subscriptions WHERE subscription_id = ?"
+CUSTOMERS_PAGE_SQL = (
+    "SELECT customer_id, first_name, last_name, email, loyalty_level FROM Customers WHERE customer_id > ?"
+)
+
+# Every query takes the id list as a single JSON array parameter, so the SQL
+# text (and therefore the cached prepared statement) is the same no matter
+# how many subscriptions or invoices are involved: 4 queries per call, always.
+SUBSCRIPTIONS_SQL = """
+    SELECT s.*, p.name AS product_name, p.description AS product_description,
+           p.category, p.monthly_fee
+    FROM Subscriptions s
+    JOIN Products p ON p.product_id = s.product_id
+    WHERE s.subscription_id IN (SELECT value FROM json_each(?))
+"""
+
+INVOICES_SQL = """
+    SELECT i.subscription_id, i.invoice_id, i.invoice_date, i.amount, i.description, i.due_date,
+           MAX(i.amount - COALESCE(SUM(CASE WHEN p.status = 'successful' THEN p.amount END), 0.0), 0.0)
+               AS outstanding
+    FROM Invoices i
+    LEFT JOIN Payments p ON p.invoice_id = i.invoice_id
+    WHERE i.subscription_id IN (SELECT value FROM json_each(?))
+    GROUP BY i.invoice_id
+    ORDER BY i.subscription_id, i.invoice_id
+"""
+
+PAYMENTS_SQL = """
+    SELECT p.*
+    FROM Invoices i
+    JOIN Payments p ON p.invoice_id = i.invoice_id
+    WHERE i.subscription_id IN (SELECT value FROM json_each(?))
+    ORDER BY p.invoice_id, p.payment_id
+"""
+
+INCIDENTS_SQL = """
+    SELECT subscription_id, incident_id, incident_date, description, resolution_status
+    FROM ServiceIncidents
+    WHERE subscription_id IN (SELECT value FROM json_each(?))
+    ORDER BY subscription_id, incident_id
+"""
+
+# every statement a tool runs, with sample parameters, for `schema.py check-plans`
+TOOL_QUERIES = {
+    "customer": (CUSTOMER_SQL, (1,)),
+    "customer_subscriptions": (CUSTOMER_SUBSCRIPTIONS_SQL, (1,)),
+    "invoice_payments": (INVOICE_PAYMENTS_SQL, (1,)),
+    "subscription_owner": (SUBSCRIPTION_OWNER_SQL, (1,)),
+    "customers_page": (CUSTOMERS_PAGE_SQL + " ORDER BY customer_id LIMIT ?", (0, 50)),
+    "customers_page_by_loyalty": (
+        CUSTOMERS_PAGE_SQL + " AND loyalty_level = ? ORDER BY customer_id LIMIT ?", (0, "Gold", 50)
+    ),
+    "subscriptions": (SUBSCRIPTIONS_SQL, ("[1]",)),
+    "invoices": (INVOICES_SQL, ("[1]",)),
+    "payments": (PAYMENTS_SQL, ("[1]",)),
+    "incidents": (INCIDENTS_SQL, ("[1]",)),
+}
@@ -0,0 +1,136 @@
+"""TTL + LRU cache for tool responses.
+
+Entries are keyed by tool name and the JSON form of the call arguments and
+carry *tags* (e.g. ``("subscription", 7)``).  Write paths call
+``invalidate(tag)`` after committing, which drops every entry carrying that
+tag.  A read that started before an invalidation is never stored, so an
+update can't be overwritten by a slower read of the old row.
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+Tag = Hashable
+_MISSING = object()
+
+
+class ResultCache:
+    def __init__(self, max_items: int = 1024, ttl: float = 60.0):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any, Tuple[Tag, ...]]]" = OrderedDict()
+        self._by_tag: Dict[Tag, Set[Tuple]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_items > 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def _drop(self, key: Tuple) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def get(self, key: Tuple) -> Any:
+        """Return the cached value or ``_MISSING``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return _MISSING
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key: Tuple, value: Any, tags: Iterable[Tag] = (), generation: Optional[int] = None) -> None:
+        """Store ``value``; skipped if anything was invalidated since ``generation``."""
+        tags = tuple(tags)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_items:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def invalidate(self, *tags: Tag) -> int:
+        """Drop every entry carrying any of ``tags``; returns the number removed."""
+        with self._lock:
+            self._generation += 1
+            keys = set()
+            for tag in tags:
+                keys |= self._by_tag.get(tag, set())
+            for key in keys:
+                self._drop(key)
+            self.stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "size": len(self._entries), "max_items": self.max_items, "ttl": self.ttl}
+
+
+def _arg_key(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return value
+
+
+def cached(cache: ResultCache, tags: Callable[..., Iterable[Tag]] = lambda *a, **kw: ()):
+    """Read-through caching for an async tool; ``tags`` gets the same arguments as the tool."""
+    def decorator(fn):
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not cache.enabled:
+                return await fn(*args, **kwargs)
+            key = (
+                name,
+                json.dumps(
+                    [[_arg_key(a) for a in args], {k: _arg_key(v) for k, v in kwargs.items()}],
+                    sort_keys=True,
+                    default=str,
+                ),
+            )
+            value = cache.get(key)
+            if value is not _MISSING:
+                return value
+            generation = cache.generation
+            value = await fn(*args, **kwargs)
+            cache.set(key, value, tags(*args, **kwargs), generation=generation)
+            return value
+
+        return wrapper
+    return decorator
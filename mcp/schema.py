@@ -0,0 +1,382 @@
+"""Schema bootstrap, migrations and synthetic data for ``contoso.db``.
+
+    python schema.py migrate --db contoso.db
+    python schema.py generate --db big.db --customers 200000 --invoices 12 --payments 2
+    python schema.py check-plans --db contoso.db
+
+Migrations are tracked with ``PRAGMA user_version``: each entry in
+``MIGRATIONS`` runs once, in order, inside its own transaction.  Every
+statement is idempotent so an existing ``contoso.db`` created before this
+module existed upgrades cleanly.
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+TABLES = [
+    """CREATE TABLE IF NOT EXISTS Customers(
+        customer_id   INTEGER PRIMARY KEY AUTOINCREMENT,
+        first_name    TEXT NOT NULL,
+        last_name     TEXT NOT NULL,
+        email         TEXT UNIQUE,
+        phone         TEXT,
+        address       TEXT,
+        loyalty_level TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS Products(
+        product_id   INTEGER PRIMARY KEY AUTOINCREMENT,
+        name         TEXT NOT NULL,
+        description  TEXT,
+        category     TEXT,
+        monthly_fee  REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS Subscriptions(
+        subscription_id  INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id      INTEGER NOT NULL,
+        product_id       INTEGER NOT NULL,
+        start_date       TEXT,
+        end_date         TEXT,
+        status           TEXT,
+        roaming_enabled  INTEGER DEFAULT 0,
+        service_status   TEXT,
+        speed_tier       TEXT,
+        data_cap_gb      INTEGER,
+        autopay_enabled  INTEGER DEFAULT 1,
+        FOREIGN KEY(customer_id) REFERENCES Customers(customer_id),
+        FOREIGN KEY(product_id)  REFERENCES Products(product_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS Invoices(
+        invoice_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+        subscription_id INTEGER,
+        invoice_date    TEXT,
+        amount          REAL,
+        description     TEXT,
+        due_date        TEXT,
+        FOREIGN KEY (subscription_id) REFERENCES Subscriptions(subscription_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS Payments(
+        payment_id   INTEGER PRIMARY KEY AUTOINCREMENT,
+        invoice_id   INTEGER,
+        payment_date TEXT,
+        amount       REAL,
+        method       TEXT,
+        status       TEXT,
+        FOREIGN KEY (invoice_id) REFERENCES Invoices(invoice_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS Promotions(
+        promotion_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id         INTEGER,
+        name               TEXT,
+        description        TEXT,
+        eligibility_criteria TEXT,
+        start_date         TEXT,
+        end_date           TEXT,
+        discount_percent   INTEGER,
+        FOREIGN KEY (product_id) REFERENCES Products(product_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS SecurityLogs(
+        log_id         INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id    INTEGER,
+        event_type     TEXT,
+        event_timestamp TEXT,
+        description    TEXT,
+        FOREIGN KEY (customer_id) REFERENCES Customers(customer_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS Orders(
+        order_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id  INTEGER,
+        product_id   INTEGER,
+        order_date   TEXT,
+        amount       REAL,
+        order_status TEXT,
+        FOREIGN KEY(customer_id) REFERENCES Customers(customer_id),
+        FOREIGN KEY(product_id)  REFERENCES Products(product_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS SupportTickets(
+        ticket_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id     INTEGER,
+        subscription_id INTEGER,
+        category        TEXT,
+        opened_at       TEXT,
+        closed_at       TEXT,
+        status          TEXT,
+        priority        TEXT,
+        subject         TEXT,
+        description     TEXT,
+        cs_agent        TEXT,
+        FOREIGN KEY(customer_id)     REFERENCES Customers(customer_id),
+        FOREIGN KEY(subscription_id) REFERENCES Subscriptions(subscription_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS DataUsage(
+        usage_id        INTEGER PRIMARY KEY AUTOINCREMENT,
+        subscription_id INTEGER,
+        usage_date      TEXT,
+        data_used_mb    INTEGER,
+        voice_minutes   INTEGER,
+        sms_count       INTEGER,
+        FOREIGN KEY(subscription_id) REFERENCES Subscriptions(subscription_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS ServiceIncidents(
+        incident_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+        subscription_id   INTEGER,
+        incident_date     TEXT,
+        description       TEXT,
+        resolution_status TEXT,
+        FOREIGN KEY(subscription_id) REFERENCES Subscriptions(subscription_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS KnowledgeDocuments(
+        document_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+        title           TEXT,
+        doc_type        TEXT,
+        content         TEXT,
+        topic_embedding TEXT
+    )""",
+]
+
+# foreign-key indexes contoso.db originally shipped with
+BASE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_subs_customer ON Subscriptions(customer_id)",
+    "CREATE INDEX IF NOT EXISTS idx_inv_sub       ON Invoices(subscription_id)",
+    "CREATE INDEX IF NOT EXISTS idx_pay_inv       ON Payments(invoice_id)",
+    "CREATE INDEX IF NOT EXISTS idx_usage_sub     ON DataUsage(subscription_id)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_cust  ON SupportTickets(customer_id)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_sub   ON SupportTickets(subscription_id)",
+    "CREATE INDEX IF NOT EXISTS idx_inc_sub       ON ServiceIncidents(subscription_id)",
+]
+
+# indexes for the MCP tool access paths
+TOOL_INDEXES = [
+    # keyset pagination filtered by loyalty level (rowid = customer_id is implied)
+    "CREATE INDEX IF NOT EXISTS idx_customers_loyalty ON Customers(loyalty_level)",
+    # covers the outstanding-balance aggregate, so it never touches Payments rows;
+    # it also serves every lookup idx_pay_inv did
+    "CREATE INDEX IF NOT EXISTS idx_pay_inv_status ON Payments(invoice_id, status, amount)",
+    "DROP INDEX IF EXISTS idx_pay_inv",
+]
+
+MIGRATIONS: List[Sequence[str]] = [
+    TABLES + BASE_INDEXES,  # 1: schema as originally shipped
+    TOOL_INDEXES,           # 2: tool access paths
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(db: sqlite3.Connection) -> int:
+    """Bring ``db`` up to ``SCHEMA_VERSION``; returns the version it ended on."""
+    version = db.execute("PRAGMA user_version").fetchone()[0]
+    for target, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        with db:
+            if not db.in_transaction:
+                db.execute("BEGIN")
+            for ddl in statements:
+                db.execute(ddl)
+            db.execute(f"PRAGMA user_version = {target}")
+        version = target
+    return version
+
+
+##############################################################################
+#                              SYNTHETIC DATA                                #
+##############################################################################
+PRODUCTS = [
+    ("Contoso Mobile Plan", "Unlimited talk & text; data-cap varies by tier.", "mobile", 50.0),
+    ("Contoso Internet Plan", "Fiber or cable internet with several speed tiers.", "internet", 60.0),
+    ("Contoso Bundle Plan", "Discount when you bundle mobile + internet.", "bundle", 90.0),
+    ("Contoso International Roaming", "Add-on for travellers.", "addon", 20.0),
+]
+_FIRST = ["Danielle", "Jessica", "Michael", "Aisha", "Kenji", "Maria", "Liam", "Priya", "Omar", "Sofia"]
+_LAST = ["Johnson", "Herrera", "Smith", "Khan", "Tanaka", "Garcia", "Brown", "Patel", "Haddad", "Rossi"]
+_LOYALTY = ["Gold", "Silver", "Bronze"]
+_METHODS = ["ach", "paypal", "apple_pay", "credit_card"]
+_PAY_STATUS = ["successful", "successful", "successful", "partial", "failed", "pending"]
+
+
+def _day(rng: random.Random, start: date = date(2024, 1, 1), span: int = 730) -> date:
+    return start + timedelta(days=rng.randrange(span))
+
+
+def _chunks(rows: Iterator[Tuple], size: int = 50_000) -> Iterator[List[Tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate_synthetic_db(
+    path: str,
+    customers: int = 1_000,
+    invoices_per_subscription: int = 12,
+    payments_per_invoice: int = 1,
+    incidents_per_subscription: float = 0.25,
+    kb_docs: int = 20,
+    embedding_dim: int = 1536,
+    seed: int = 0,
+) -> Dict[str, int]:
+    """Create (or extend) a database at ``path`` filled with reproducible fake data.
+
+    One subscription per customer; row counts scale linearly, so e.g.
+    ``customers=100_000, payments_per_invoice=1`` gives 1.2M payments.
+    Indexes are created after the bulk load, which is much faster than
+    maintaining them row by row.
+    """
+    rng = random.Random(seed)
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode = OFF")
+    db.execute("PRAGMA synchronous = OFF")
+    with db:
+        for ddl in TABLES:
+            db.execute(ddl)
+        if not db.execute("SELECT 1 FROM Products").fetchone():
+            db.executemany("INSERT INTO Products (name, description, category, monthly_fee) VALUES (?, ?, ?, ?)", PRODUCTS)
+        product_ids = [r[0] for r in db.execute("SELECT product_id FROM Products")]
+        cust_base = db.execute("SELECT COALESCE(MAX(customer_id), 0) FROM Customers").fetchone()[0]
+        sub_base = db.execute("SELECT COALESCE(MAX(subscription_id), 0) FROM Subscriptions").fetchone()[0]
+        inv_base = db.execute("SELECT COALESCE(MAX(invoice_id), 0) FROM Invoices").fetchone()[0]
+
+        def customer_rows():
+            for i in range(1, customers + 1):
+                cid = cust_base + i
+                first, last = rng.choice(_FIRST), rng.choice(_LAST)
+                yield (cid, first, last, f"{first}.{last}.{cid}@example.net".lower(),
+                       f"+1-555-{cid % 10_000:04d}", f"{cid} Main St", rng.choice(_LOYALTY))
+
+        def subscription_rows():
+            for i in range(1, customers + 1):
+                start = _day(rng)
+                yield (sub_base + i, cust_base + i, rng.choice(product_ids), start.isoformat(),
+                       (start + timedelta(days=365)).isoformat(), rng.choice(["active", "inactive"]),
+                       rng.randint(0, 1), rng.choice(["normal", "slow", "offline"]),
+                       rng.choice(["50Mbps", "100Mbps", "300Mbps", "1Gbps", "NA"]), rng.choice([10, 50, 100]),
+                       rng.randint(0, 1))
+
+        invoice_amounts: List[float] = []
+
+        def invoice_rows():
+            for s in range(1, customers + 1):
+                for _ in range(invoices_per_subscription):
+                    issued = _day(rng)
+                    amount = round(rng.uniform(20, 150), 2)
+                    invoice_amounts.append(amount)
+                    yield (sub_base + s, issued.isoformat(), amount, "Monthly service charge",
+                           (issued + timedelta(days=14)).isoformat())
+
+        def payment_rows():
+            for n, amount in enumerate(invoice_amounts, start=1):
+                for _ in range(payments_per_invoice):
+                    yield (inv_base + n, _day(rng).isoformat(), round(amount / payments_per_invoice, 2),
+                           rng.choice(_METHODS), rng.choice(_PAY_STATUS))
+
+        def incident_rows():
+            for _ in range(int(customers * incidents_per_subscription)):
+                yield (sub_base + rng.randint(1, customers), _day(rng).isoformat(), "Service degradation reported",
+                       rng.choice(["resolved", "investigating"]))
+
+        def kb_rows():
+            for i in range(kb_docs):
+                vector = [round(rng.gauss(0, 1), 4) for _ in range(embedding_dim)]
+                yield (f"Synthetic document {i}", rng.choice(["Policy", "FAQ", "Troubleshooting"]),
+                       f"Synthetic knowledge base article number {i}.", json.dumps(vector))
+
+        inserts = [
+            ("INSERT INTO Customers VALUES (?, ?, ?, ?, ?, ?, ?)", customer_rows),
+            ("INSERT INTO Subscriptions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", subscription_rows),
+            ("INSERT INTO Invoices (subscription_id, invoice_date, amount, description, due_date) VALUES (?, ?, ?, ?, ?)",
+             invoice_rows),
+            ("INSERT INTO Payments (invoice_id, payment_date, amount, method, status) VALUES (?, ?, ?, ?, ?)",
+             payment_rows),
+            ("INSERT INTO ServiceIncidents (subscription_id, incident_date, description, resolution_status) "
+             "VALUES (?, ?, ?, ?)", incident_rows),
+            ("INSERT INTO KnowledgeDocuments (title, doc_type, content, topic_embedding) VALUES (?, ?, ?, ?)", kb_rows),
+        ]
+        for sql, rows in inserts:
+            for chunk in _chunks(rows()):
+                db.executemany(sql, chunk)
+    migrate(db)
+    db.execute("ANALYZE")
+    counts = {
+        table: db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("Customers", "Subscriptions", "Invoices", "Payments", "ServiceIncidents", "KnowledgeDocuments")
+    }
+    db.close()
+    return counts
+
+
+##############################################################################
+#                              QUERY PLAN CHECK                              #
+##############################################################################
+def full_scans(db: sqlite3.Connection, sql: str, params: Sequence = ()) -> List[str]:
+    """Return the ``EXPLAIN QUERY PLAN`` steps of ``sql`` that scan a whole table."""
+    plan = db.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return [row[3] for row in plan if row[3].startswith("SCAN ") and "VIRTUAL TABLE" not in row[3]]
+
+
+def check_query_plans(db: sqlite3.Connection, queries: Dict[str, Tuple[str, Sequence]]) -> Dict[str, List[str]]:
+    """Map each query name to its full-scan steps; an empty dict means every query uses an index."""
+    problems = {}
+    for name, (sql, params) in queries.items():
+        scans = full_scans(db, sql, params)
+        if scans:
+            problems[name] = scans
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    m = sub.add_parser("migrate", help="create missing tables/indexes and bump user_version")
+    m.add_argument("--db", default="contoso.db")
+
+    g = sub.add_parser("generate", help="build a synthetic database")
+    g.add_argument("--db", required=True)
+    g.add_argument("--customers", type=int, default=1_000)
+    g.add_argument("--invoices", type=int, default=12, help="invoices per subscription")
+    g.add_argument("--payments", type=int, default=1, help="payments per invoice")
+    g.add_argument("--kb-docs", type=int, default=20)
+    g.add_argument("--seed", type=int, default=0)
+
+    c = sub.add_parser("check-plans", help="fail if any tool query does a full table scan (after migrating)")
+    c.add_argument("--db", default="contoso.db")
+
+    args = parser.parse_args(argv)
+    if args.command == "migrate":
+        db = sqlite3.connect(args.db)
+        print(f"schema version {migrate(db)}")
+        db.close()
+    elif args.command == "generate":
+        counts = generate_synthetic_db(
+            args.db, customers=args.customers, invoices_per_subscription=args.invoices,
+            payments_per_invoice=args.payments, kb_docs=args.kb_docs, seed=args.seed,
+        )
+        print(json.dumps(counts, indent=2))
+    elif args.command == "check-plans":
+        from queries import TOOL_QUERIES
+
+        # check against the migrated schema without touching the file itself
+        source = sqlite3.connect(args.db)
+        db = sqlite3.connect(":memory:")
+        source.backup(db)
+        source.close()
+        migrate(db)
+        problems = check_query_plans(db, TOOL_QUERIES)
+        db.close()
+        for name, scans in problems.items():
+            print(f"{name}: {'; '.join(scans)}", file=sys.stderr)
+        if problems:
+            return 1
+        print(f"{len(TOOL_QUERIES)} tool queries checked, no full scans")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,5 @@
+from typing import AsyncIterator, Optional, Tuple
+
 from semantic_kernel import Kernel
 from plugins.weather_plugin import WeatherPlugin
 from semantic_kernel.connectors.ai.function_choice_behavior import (
@@ -9,14 +11,30 @@ from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.azure_chat_
     AzureChatPromptExecutionSettings,
 )
 from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+from functions.streaming import StreamMetrics, measure_stream
+from functions.tool_scheduler import ToolCallScheduler
+
+# Only the multi-city function is offered by default: one call covers every city
+# in the question, and one schema instead of four goes out with each request.
+# get_current_weather, get_forecast and get_weather_alert are then hidden from
+# the model; pass batch_tools=False (``python main.py weather --single-city-tools``)
+# to offer those instead.
+BATCH_TOOLS = {"included_functions": ["Weather-get_weather_report"]}
+SINGLE_CITY_TOOLS = {"excluded_functions": ["Weather-get_weather_report"]}
 
-async def run_weather_report_plugin(kernel: Kernel, chat_completion: AzureChatCompletion, user_message: str = "What's the weather like in Tokyo and are there any alerts?"):
-    # Create the plugin
-    weather_plugin = WeatherPlugin()
+def _function_choice(batch_tools: bool) -> FunctionChoiceBehavior:
+    return FunctionChoiceBehavior.Auto(filters=BATCH_TOOLS if batch_tools else SINGLE_CITY_TOOLS)
+
+def _prepare(kernel: Kernel, user_message: str, scheduler: Optional[ToolCallScheduler], batch_tools: bool) -> Tuple[ChatHistory, AzureChatPromptExecutionSettings]:
+    """Register the weather plugin (and scheduler) on ``kernel``; the history and settings to ask with."""
+    # several cities in one question come back as several tool calls in one turn;
+    # the scheduler bounds and times them out per plugin
+    if scheduler is not None:
+        scheduler.register(kernel)
 
     # Register with kernel
     kernel.add_plugin(
-        plugin=weather_plugin,
+        plugin=WeatherPlugin(),
         plugin_name="Weather"
     )
 
@@ -24,17 +42,53 @@ async def run_weather_report_plugin(kernel: Kernel, chat_completion: AzureChatCo
     history = ChatHistory()
     history.add_user_message(user_message)
 
-    # Get response using function calling
     execution_settings = AzureChatPromptExecutionSettings()
 
     #FunctionChoiceBehavior.Auto() tells the model:
     #“When you think one of the available functions is relevant based on the user's prompt, automatically call it.”
-    execution_settings.function_choice_behavior = FunctionChoiceBehavior.Auto()
+    execution_settings.function_choice_behavior = _function_choice(batch_tools)
+    return history, execution_settings
+
+async def weather_report_plugin(kernel: Kernel, chat_completion: AzureChatCompletion, user_message: str = "What's the weather like in Tokyo and are there any alerts?", scheduler: Optional[ToolCallScheduler] = None, batch_tools: bool = True):
+    history, execution_settings = _prepare(kernel, user_message, scheduler, batch_tools)
+
+    # Get response using function calling
+    return await chat_completion.get_chat_message_content(
+        chat_history=history,
+        settings=execution_settings,
+        kernel=kernel,
+    )
 
-    result = await chat_completion.get_chat_message_content(
+async def run_weather_report_plugin(kernel: Kernel, chat_completion: AzureChatCompletion, user_message: str = "What's the weather like in Tokyo and are there any alerts?", scheduler: Optional[ToolCallScheduler] = None, batch_tools: bool = True):
+    result = await weather_report_plugin(kernel, chat_completion, user_message, scheduler, batch_tools)
+    print("Assistant > " + str(result))
+
+async def stream_weather_report_plugin(
+    kernel: Kernel,
+    chat_completion: AzureChatCompletion,
+    user_message: str = "What's the weather like in Tokyo and are there any alerts?",
+    metrics: Optional[StreamMetrics] = None,
+    scheduler: Optional[ToolCallScheduler] = None,
+    batch_tools: bool = True,
+) -> AsyncIterator[str]:
+    """Same flow as run_weather_report_plugin, yielding the answer as it streams in.
+
+    Tool calls still run before the first token; TTFT includes them.
+    """
+    history, execution_settings = _prepare(kernel, user_message, scheduler, batch_tools)
+    source = chat_completion.get_streaming_chat_message_contents(
         chat_history=history,
         settings=execution_settings,
         kernel=kernel,
     )
+    async for text in measure_stream(source, metrics):
+        yield text
+
+async def run_weather_report_plugin_stream(kernel: Kernel, chat_completion: AzureChatCompletion, user_message: str = "What's the weather like in Tokyo and are there any alerts?", scheduler: Optional[ToolCallScheduler] = None, batch_tools: bool = True):
+    metrics = StreamMetrics()
+    print("Assistant > ", end="")
+    async for text in stream_weather_report_plugin(kernel, chat_completion, user_message, metrics, scheduler, batch_tools):
+        print(text, end="", flush=True)
+    print()
+    print(metrics.report())
 
-    print("Assistant > " + str(result))
\ No newline at end of file
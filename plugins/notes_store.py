@@ -0,0 +1,146 @@
+"""SQLite storage for NotesPlugin.
+
+Notes live in a plain table with an FTS5 index kept in sync by triggers, so
+keyword search, time-range filtering and "newest first" pages all run off an
+index and cost the same with ten notes or ten thousand.  Pages are keyset
+based: each one ends with a cursor (the last note's ``created_at`` and id)
+and the next page starts strictly after it, so page 1000 costs what page 1
+does.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+MAX_PAGE_SIZE = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    note TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_created ON notes(created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(note, content='notes', content_rowid='id');
+-- COUNT(*) scans the table; keep the count up to date instead
+CREATE TABLE IF NOT EXISTS notes_count (n INTEGER NOT NULL);
+INSERT INTO notes_count SELECT COUNT(*) FROM notes WHERE NOT EXISTS (SELECT 1 FROM notes_count);
+CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts(rowid, note) VALUES (new.id, new.note);
+    UPDATE notes_count SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, note) VALUES ('delete', old.id, old.note);
+    UPDATE notes_count SET n = n - 1;
+END;
+"""
+
+
+def clamp(value: int, high: int = MAX_PAGE_SIZE) -> int:
+    """``value`` limited to 1..``high`` (a negative LIMIT means "no limit" to SQLite)."""
+    return max(1, min(value, high))
+
+
+def encode_cursor(created_at: str, note_id: int) -> str:
+    return f"{created_at}|{note_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    created_at, _, note_id = cursor.rpartition("|")
+    if not created_at or not note_id.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return created_at, int(note_id)
+
+
+def fts_query(text: str) -> str:
+    """Match every word of ``text``, each quoted so punctuation can't break the FTS syntax."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class NotesStore:
+    def __init__(self, path: str = "notes.db"):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def add(self, note: str, created_at: Optional[str] = None) -> Tuple[int, str]:
+        created_at = created_at or datetime.now().isoformat()
+        with self._lock:
+            cur = self._db.execute("INSERT INTO notes (created_at, note) VALUES (?, ?)", (created_at, note))
+            self._db.commit()
+        return cur.lastrowid, created_at
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT n FROM notes_count").fetchone()[0]
+
+    def page(self, page_size: int = 10, cursor: Optional[str] = None) -> Tuple[List[Tuple[str, str]], Optional[str]]:
+        """Newest first, as (timestamp, note), plus the cursor for the next page (None on the last)."""
+        page_size = clamp(page_size)
+        sql = "SELECT id, created_at, note FROM notes"
+        params: list = []
+        if cursor:
+            sql += " WHERE (created_at, id) < (?, ?)"
+            params.extend(decode_cursor(cursor))
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = self._db.execute(sql, (*params, page_size + 1)).fetchall()
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+        return [(created_at, note) for _, created_at, note in rows], next_cursor
+
+    def search(
+        self,
+        query: str = "",
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 10,
+    ) -> List[Tuple[str, str]]:
+        """Notes matching every keyword in ``query`` (best match first) within [since, until)."""
+        limit = clamp(limit)
+        where, params = [], []
+        if since:
+            where.append("n.created_at >= ?")
+            params.append(since)
+        if until:
+            where.append("n.created_at < ?")
+            params.append(until)
+        if query.strip():
+            sql = (
+                "SELECT n.created_at, n.note FROM notes_fts JOIN notes n ON n.id = notes_fts.rowid "
+                "WHERE notes_fts MATCH ?"
+            )
+            params.insert(0, fts_query(query))
+            order = "ORDER BY notes_fts.rank"
+            if where:
+                sql += " AND " + " AND ".join(where)
+        else:
+            sql = "SELECT n.created_at, n.note FROM notes n"
+            order = "ORDER BY n.id DESC"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            return self._db.execute(f"{sql} {order} LIMIT ?", (*params, limit)).fetchall()
+
+    def summary(self, recent: int = 3, width: int = 60) -> str:
+        """Count, time span and the few newest notes, shortened to ``width`` characters."""
+        with self._lock:
+            count = self._db.execute("SELECT n FROM notes_count").fetchone()[0]
+            # separate MIN / MAX queries are each answered from the index
+            first = self._db.execute("SELECT MIN(created_at) FROM notes").fetchone()[0]
+            last = self._db.execute("SELECT MAX(created_at) FROM notes").fetchone()[0]
+            rows = self._db.execute("SELECT created_at, note FROM notes ORDER BY id DESC LIMIT ?", (recent,)).fetchall()
+        if not count:
+            return "No notes."
+        newest = "; ".join(f"[{ts}] {note if len(note) <= width else note[: width - 1] + '…'}" for ts, note in rows)
+        return f"{count} notes from {first} to {last}. Newest: {newest}"
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
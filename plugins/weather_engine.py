@@ -0,0 +1,201 @@
+"""Reproducible simulated weather for WeatherPlugin.
+
+Each (city, year) gets its own NumPy time series - temperature, condition,
+humidity and wind for every day of the year - generated in one vectorized
+pass from a seed derived from ``(seed, city, year)``.  The same city and
+date therefore always give the same weather, across calls and across
+processes, and any query (current, forecast, many cities at once) is just
+indexing into arrays that are built once.  Per-day results are additionally
+kept in an LRU keyed by (city, date), so agents asking again get the same
+dict back without touching NumPy.
+
+Series can be saved with ``save()`` and loaded back with ``load()`` to serve
+a fixed data set instead of generating one.
+"""
+
+import math
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+CONDITIONS = ("Sunny", "Cloudy", "Rainy", "Snowy", "Windy", "Foggy", "Stormy")
+
+TEMPERATURE_RANGES = {
+    "New York": (50, 85),
+    "London": (45, 75),
+    "Tokyo": (55, 90),
+    "Sydney": (60, 95),
+    "Paris": (48, 80),
+    "Default": (40, 100),
+}
+
+# Simulated alerts
+ALERTS = {
+    "New York": "Heat advisory in effect",
+    "Tokyo": "Typhoon warning for coastal areas",
+    "Sydney": None,
+    "London": None,
+    "Paris": "Air quality warning",
+}
+
+# seasons are flipped south of the equator
+SOUTHERN_HEMISPHERE = {"Sydney"}
+
+FIELDS = ("temperature", "condition", "humidity", "wind_speed")
+
+Series = Dict[str, np.ndarray]
+
+
+class WeatherEngine:
+    def __init__(
+        self,
+        seed: int = 0,
+        temperature_ranges: Optional[Dict[str, Tuple[int, int]]] = None,
+        alerts: Optional[Dict[str, Optional[str]]] = None,
+        conditions: Iterable[str] = CONDITIONS,
+        cache_size: int = 10_000,
+        today: Optional[date] = None,
+    ):
+        self.seed = seed
+        self.temperature_ranges = dict(temperature_ranges or TEMPERATURE_RANGES)
+        self.alerts = dict(alerts if alerts is not None else ALERTS)
+        self.conditions = tuple(conditions)
+        self.cache_size = cache_size
+        self._today = today
+        self._series: Dict[Tuple[str, int], Series] = {}
+        self._days: "OrderedDict[Tuple[str, int], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"series_built": 0, "day_hits": 0, "day_misses": 0}
+
+    @property
+    def today(self) -> date:
+        return self._today or date.today()
+
+    # -- series ------------------------------------------------------------
+
+    def _generate(self, city: str, year: int) -> Series:
+        low, high = self.temperature_ranges.get(city, self.temperature_ranges["Default"])
+        days = 366 if date(year, 12, 31).timetuple().tm_yday == 366 else 365
+        rng = np.random.default_rng(zlib.crc32(f"{self.seed}:{city}:{year}".encode("utf-8")))
+        day_of_year = np.arange(days)
+        hemisphere = -1.0 if city in SOUTHERN_HEMISPHERE else 1.0
+        # warmest around late July (late January in the south)
+        season = hemisphere * np.sin(2 * math.pi * (day_of_year - 110) / days)
+        span = high - low
+        temperature = low + span * (0.5 + 0.35 * season) + rng.normal(0.0, span * 0.1, days)
+        return {
+            "temperature": np.clip(np.rint(temperature), low, high).astype(np.int16),
+            "condition": rng.integers(0, len(self.conditions), days, dtype=np.int8),
+            "humidity": rng.integers(30, 96, days, dtype=np.int16),
+            "wind_speed": rng.integers(0, 31, days, dtype=np.int16),
+        }
+
+    def series(self, city: str, year: int) -> Series:
+        """Arrays of every field for each day of ``year`` (index = day of year - 1)."""
+        key = (city, year)
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = self._generate(city, year)
+                    self.stats["series_built"] += 1
+        return series
+
+    def arrays(self, city: str, start: date, days: int) -> Series:
+        """Every field for ``days`` consecutive days from ``start``, as arrays."""
+        parts: Dict[str, List[np.ndarray]] = {f: [] for f in FIELDS}
+        current, remaining = start, days
+        while remaining > 0:
+            series = self.series(city, current.year)
+            first = current.timetuple().tm_yday - 1
+            take = min(remaining, len(series["temperature"]) - first)
+            for f in FIELDS:
+                parts[f].append(series[f][first:first + take])
+            current += timedelta(days=take)
+            remaining -= take
+        return {f: np.concatenate(chunks) if len(chunks) > 1 else chunks[0] for f, chunks in parts.items()}
+
+    # -- per-day lookups ---------------------------------------------------
+
+    def day(self, city: str, when: date) -> Dict:
+        """Weather for ``city`` on ``when`` (cached per city and date)."""
+        key = (city, when.toordinal())
+        with self._lock:
+            cached = self._days.get(key)
+            if cached is not None:
+                self._days.move_to_end(key)
+                self.stats["day_hits"] += 1
+                return cached
+        series = self.series(city, when.year)
+        i = when.timetuple().tm_yday - 1
+        value = {
+            "temperature": int(series["temperature"][i]),
+            "condition": self.conditions[series["condition"][i]],
+            "humidity": int(series["humidity"][i]),
+            "wind_speed": int(series["wind_speed"][i]),
+        }
+        with self._lock:
+            self.stats["day_misses"] += 1
+            self._days[key] = value
+            while len(self._days) > self.cache_size:
+                self._days.popitem(last=False)
+        return value
+
+    def current(self, city: str) -> Dict:
+        return {"location": city, **self.day(city, self.today)}
+
+    def forecast(self, city: str, days: int = 3) -> List[Dict]:
+        """``days`` days starting today; day 1 is today."""
+        today = self.today
+        return [{"day": i + 1, **self.day(city, today + timedelta(days=i))} for i in range(days)]
+
+    def alert(self, city: str) -> Dict:
+        message = self.alerts.get(city)
+        return {
+            "location": city,
+            "has_alert": message is not None,
+            "alert_message": message if message else "No active alerts",
+        }
+
+    # -- bulk --------------------------------------------------------------
+
+    def current_many(self, cities: Iterable[str]) -> Dict[str, Dict]:
+        return {city: self.current(city) for city in cities}
+
+    def forecast_many(self, cities: Iterable[str], days: int = 3) -> Dict[str, List[Dict]]:
+        return {city: self.forecast(city, days) for city in cities}
+
+    def alerts_many(self, cities: Iterable[str]) -> Dict[str, Dict]:
+        return {city: self.alert(city) for city in cities}
+
+    def table(self, cities: Iterable[str], start: Optional[date] = None, days: int = 7) -> Dict[str, np.ndarray]:
+        """One (cities x days) array per field, for analysis over many cities at once."""
+        cities = list(cities)
+        start = start or self.today
+        per_city = [self.arrays(city, start, days) for city in cities]
+        return {f: np.stack([a[f] for a in per_city]) if per_city else np.empty((0, days)) for f in FIELDS}
+
+    # -- persistence -------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """Write every series built so far to an ``.npz`` file."""
+        with self._lock:
+            items = list(self._series.items())
+        np.savez_compressed(path, **{f"{city}|{year}|{f}": s[f] for (city, year), s in items for f in FIELDS})
+
+    def load(self, path: str) -> int:
+        """Serve the series stored in ``path`` instead of generating them; returns how many were loaded."""
+        loaded: Dict[Tuple[str, int], Series] = {}
+        with np.load(path) as data:
+            for name in data.files:
+                city, year, field = name.rsplit("|", 2)
+                loaded.setdefault((city, int(year)), {})[field] = data[name]
+        with self._lock:
+            self._series.update(loaded)
+            self._days.clear()
+        return len(loaded)
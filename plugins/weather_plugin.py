@@ -1,45 +1,37 @@
-import random
-from typing import Annotated, Dict, List
+from typing import Annotated, Dict, List, Optional
 from semantic_kernel.functions import kernel_function
+from plugins.weather_engine import WeatherEngine
+
+REPORT_FIELDS = ("now", "alerts", "forecast")
+MAX_REPORT_LOCATIONS = 25
+
+# one engine for every plugin built without its own: the orchestrators create a
+# WeatherPlugin per request, and the series and per-day cache should outlive it
+_default_engine: Optional[WeatherEngine] = None
+
+def default_engine() -> WeatherEngine:
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = WeatherEngine()
+    return _default_engine
 
 class WeatherPlugin:
-    def __init__(self):
-        self.weather_conditions = ["Sunny", "Cloudy", "Rainy", "Snowy", "Windy", "Foggy", "Stormy"]
-        self.temperature_ranges = {
-            "New York": (50, 85),
-            "London": (45, 75),
-            "Tokyo": (55, 90),
-            "Sydney": (60, 95),
-            "Paris": (48, 80),
-            "Default": (40, 100)
-        }
+    def __init__(self, engine: Optional[WeatherEngine] = None):
+        # answers come from seeded per-city series, so asking twice gives the same weather
+        self.engine = engine or default_engine()
+        self.weather_conditions = list(self.engine.conditions)
+        self.temperature_ranges = self.engine.temperature_ranges
 
         # Simulated alerts
-        self.alerts = {
-            "New York": "Heat advisory in effect",
-            "Tokyo": "Typhoon warning for coastal areas",
-            "Sydney": None,
-            "London": None,
-            "Paris": "Air quality warning"
-        }
+        self.alerts = self.engine.alerts
 
     @kernel_function
     async def get_current_weather(self, location: Annotated[str, "The city name to get the weather for."]):
         """
         Get the current weather conditions and temperature for a given location.
         """
-        temp_range = self.temperature_ranges.get(location, self.temperature_ranges["Default"])
-        temperature = random.randint(temp_range[0], temp_range[1])
-        condition = random.choice(self.weather_conditions)
-        
-        return {
-            "location": location,
-            "temperature": temperature,
-            "condition": condition,
-            "humidity": random.randint(30, 95),
-            "wind_speed": random.randint(0, 30)
-        }
-    
+        return self.engine.current(location)
+
     @kernel_function
     async def get_forecast(
         self,
@@ -47,19 +39,7 @@ class WeatherPlugin:
         days: Annotated[int, "Number of days for the forecast"] = 3
     ) -> List[Dict]:
         """Gets a weather forecast for a specified number of days."""
-        forecast = []
-        temp_range = self.temperature_ranges.get(location, self.temperature_ranges["Default"])
-        
-        for i in range(days):
-            forecast.append({
-                "day": i + 1,
-                "temperature": random.randint(temp_range[0], temp_range[1]),
-                "condition": random.choice(self.weather_conditions),
-                "humidity": random.randint(30, 95),
-                "wind_speed": random.randint(0, 30)
-            })
-        
-        return forecast
+        return self.engine.forecast(location, days)
 
     @kernel_function
     async def get_weather_alert(
@@ -67,10 +47,39 @@ class WeatherPlugin:
         location: Annotated[str, "The city name to check for weather alerts"]
     ) -> Dict:
         """Gets any active weather alerts for a location."""
-        alert = self.alerts.get(location)
-        
-        return {
-            "location": location,
-            "has_alert": alert is not None,
-            "alert_message": alert if alert else "No active alerts"
-        }
\ No newline at end of file
+        return self.engine.alert(location)
+
+    # One call for any number of cities, answered as one short line per city.  The
+    # schema is kept small on purpose: it is sent with every model request.
+    @kernel_function(description="Weather for one or more cities in one call.")
+    async def get_weather_report(
+        self,
+        locations: Annotated[List[str], "City names"],
+        fields: Annotated[str, "Comma-separated: now,alerts,forecast"] = "now,alerts",
+        days: Annotated[int, "Forecast days"] = 3,
+    ) -> str:
+        """Current weather, alerts and/or forecast for several cities, one line per city."""
+        wanted = [f.strip().lower() for f in fields.split(",") if f.strip()] or ["now"]
+        unknown = [f for f in wanted if f not in REPORT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields {unknown}; use {','.join(REPORT_FIELDS)}")
+        cities = list(dict.fromkeys(locations))
+        lines = [self._report_line(city, wanted, days) for city in cities[:MAX_REPORT_LOCATIONS]]
+        if len(cities) > MAX_REPORT_LOCATIONS:
+            # say which cities were left out, so the model can ask for them in another call
+            lines.append(f"truncated (max {MAX_REPORT_LOCATIONS} per call): " + ", ".join(cities[MAX_REPORT_LOCATIONS:]))
+        return "\n".join(lines)
+
+    def _report_line(self, city: str, fields: List[str], days: int) -> str:
+        parts = []
+        if "now" in fields:
+            w = self.engine.current(city)
+            parts.append(f"{w['temperature']}F {w['condition']}, {w['humidity']}% hum, wind {w['wind_speed']}mph")
+        if "alerts" in fields:
+            alert = self.engine.alert(city)
+            parts.append(f"alert: {alert['alert_message']}" if alert["has_alert"] else "no alerts")
+        if "forecast" in fields:
+            parts.append("next: " + ", ".join(
+                f"{d['temperature']}F {d['condition']}" for d in self.engine.forecast(city, days)
+            ))
+        return f"{city}: " + "; ".join(parts)